@@ -3,6 +3,7 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     project_name: str = "Gemini Hackathon AI World"
     gemini_api_key: str = ""
+    debug: bool = False  # human-readable (indented) persisted JSON, etc.
 
     # Memory
     memory_persist_dir: str = "data/memory_indexes"
@@ -23,12 +24,20 @@ class Settings(BaseSettings):
     reflection_importance_threshold: float = 150.0
     reflection_recent_memory_count: int = 100
     reflection_default_importance: int = 8
+    reflection_fused_prompt: bool = True  # questions + insights in one Gemini call
+
+    # LLM result cache (plans, reflections) keyed on a digest of the inputs
+    llm_result_cache_enabled: bool = True
+    llm_result_cache_ttl_seconds: float = 3600.0
+    llm_result_cache_max_entries: int = 1024
 
     # Memory consolidation
     memory_max_per_agent: int = 500
     memory_short_term_buffer: int = 50
     memory_consolidation_similarity_threshold: float = 0.85
     memory_consolidation_cluster_size: int = 5
+    memory_consolidation_ann_min_size: int = 2000  # use FAISS HNSW above this many memories
+    memory_consolidation_ann_neighbors: int = 10
     memory_decay_rate_per_day: float = 0.02
     memory_prune_importance_threshold: float = 1.0
 
@@ -51,17 +60,26 @@ class Settings(BaseSettings):
     neo4j_user: str = "neo4j"
     neo4j_password: str = "password"
     neo4j_database: str = "neo4j"
+    neo4j_pool_size: int = 100
+    neo4j_acquisition_timeout_seconds: float = 15.0
+    neo4j_connection_timeout_seconds: float = 5.0
+    neo4j_max_retry_time_seconds: float = 5.0  # retry budget for transient errors
 
     # Langfuse observability
     langfuse_public_key: str = ""
     langfuse_secret_key: str = ""
     langfuse_host: str = "http://localhost:3000"
     langfuse_enabled: bool = False
+    langfuse_sample_rate: float = 1.0  # fraction of agent actions traced
 
     # Temporal
     temporal_host: str = "localhost:7233"
     temporal_namespace: str = "default"
     temporal_task_queue: str = "agent-task-queue"
+    temporal_store_llm_reasoning: bool = True  # keep raw LLM replies on tick results
+    temporal_llm_cache_enabled: bool = True
+    temporal_llm_cache_dir: str = ".cache/llm"  # relative to the backend dir
+    temporal_llm_cache_max_entries: int = 4096
 
     class Config:
         env_file = ("../.env", ".env")
@@ -101,6 +101,8 @@ async def _auto_tick_loop() -> None:
             results = await agent_manager.tick_all()
             _auto_tick_count += 1
             social_graph.decay_relationships(elapsed_days=0.01)
+            # Write only the relationships changed this tick, off the event loop
+            await social_graph.persist_async()
             await _broadcast_state()
             logger.info(
                 "Auto-tick #%d complete — %d results",
@@ -604,6 +606,7 @@ async def start_simulation(req: StartSimulationRequest = StartSimulationRequest(
             SimulationInput(
                 tick_interval_seconds=req.tick_interval_seconds,
                 max_ticks_before_continue_as_new=req.max_ticks,
+                store_llm_reasoning=settings.temporal_store_llm_reasoning,
             ),
             id=SIMULATION_WORKFLOW_ID,
             task_queue=settings.temporal_task_queue,
@@ -623,6 +626,8 @@ async def start_simulation(req: StartSimulationRequest = StartSimulationRequest(
                 persona=f"{agent.name} is a resident of the town.",
                 current_location_id=agent.location_id,
                 current_action=agent.current_action,
+                current_x=agent.x,
+                current_y=agent.y,
             ),
         )
 
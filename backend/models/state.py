@@ -1,6 +1,7 @@
+from collections import defaultdict, deque
 from enum import Enum
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Any, Deque, Dict, List, Optional
 
 
 class NodeType(str, Enum):
@@ -50,5 +51,58 @@ class WorldState(BaseModel):
     environment_root: EnvironmentNode
     agents: List[AgentState]
     expansion_count: int = 0
-    pending_messages: Dict[str, List[dict]] = Field(default_factory=dict)
-    location_events: Dict[str, List[dict]] = Field(default_factory=dict)
+    pending_messages: Dict[str, Deque[dict]] = Field(default_factory=lambda: defaultdict(deque))
+    location_events: Dict[str, Deque[dict]] = Field(default_factory=dict)  # bounded per location
+
+    # Bumped whenever the environment tree changes shape; derived lookups
+    # (services.world_index) are rebuilt lazily when it moves.
+    _version: int = PrivateAttr(default=0)
+    _index: Any = PrivateAttr(default=None)
+    # Agent lookups, built lazily and rebuilt if the agents list changes size;
+    # location changes must go through move_agent to keep them in sync.
+    _agents_by_id: Dict[str, AgentState] = PrivateAttr(default_factory=dict)
+    _agents_by_location: Dict[str, List[AgentState]] = PrivateAttr(default_factory=dict)
+    _agents_indexed: int = PrivateAttr(default=-1)
+
+    @field_validator("pending_messages", mode="after")
+    @classmethod
+    def _pending_as_defaultdict(cls, value: Dict[str, Deque[dict]]) -> Dict[str, Deque[dict]]:
+        # Senders append without checking for the recipient's queue first
+        return defaultdict(deque, value)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def mark_structure_changed(self) -> None:
+        """Call after adding, removing or moving environment nodes."""
+        self._version += 1
+
+    def _agent_maps(self) -> Dict[str, AgentState]:
+        if self._agents_indexed != len(self.agents):
+            self._agents_indexed = len(self.agents)
+            self._agents_by_id = {a.id: a for a in reversed(self.agents)}
+            by_location: Dict[str, List[AgentState]] = {}
+            for a in self.agents:
+                by_location.setdefault(a.location_id, []).append(a)
+            self._agents_by_location = by_location
+        return self._agents_by_id
+
+    def get_agent(self, agent_id: str) -> Optional[AgentState]:
+        """Look up an agent by id."""
+        return self._agent_maps().get(agent_id)
+
+    def agents_at(self, location_id: str) -> List[AgentState]:
+        """Return all agents currently at a location."""
+        self._agent_maps()
+        return list(self._agents_by_location.get(location_id, ()))
+
+    def move_agent(self, agent: AgentState, location_id: str) -> None:
+        """Set an agent's location_id, keeping the per-location index current."""
+        self._agent_maps()
+        if agent.location_id != location_id:
+            bucket = self._agents_by_location.get(agent.location_id, [])
+            # Identity, not ==: pydantic compares by field values
+            self._agents_by_location[agent.location_id] = [a for a in bucket if a is not agent]
+            self._agents_by_location.setdefault(location_id, []).append(agent)
+        agent.location_id = location_id
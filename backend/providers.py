@@ -11,6 +11,7 @@ new classes that satisfy the same protocols and register them instead.
 
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import TYPE_CHECKING, Optional
 
@@ -55,7 +56,9 @@ class GeminiLLMProvider:
         model_name = request.model_name if request.model_name != "default" else self._default_model
         model = genai.GenerativeModel(model_name)
 
-        response = model.generate_content(
+        # Async API, so concurrent calls (e.g. call_llm_batch) overlap instead
+        # of blocking the worker's event loop one after another
+        response = await model.generate_content_async(
             request.prompt,
             generation_config=genai.types.GenerationConfig(
                 temperature=request.temperature,
@@ -92,15 +95,29 @@ class LlamaIndexMemoryProvider:
         self._store = memory_store
 
     async def retrieve(self, query: MemoryQuery) -> MemoryResult:
-        results = self._store.retrieve(
+        # MemoryStore.retrieve blocks (embedding request + vector search)
+        results = await asyncio.to_thread(
+            self._store.retrieve,
             agent_id=query.agent_id,
             query=query.context,
             top_k=query.top_k,
         )
+        return self._to_result(query.agent_id, results)
+
+    async def retrieve_batch(self, queries: list[MemoryQuery]) -> list[MemoryResult]:
+        """Retrieve for several agents with one batched embedding request."""
+        ranked = await asyncio.to_thread(
+            self._store.retrieve_many,
+            [(q.agent_id, q.context, q.top_k) for q in queries],
+        )
+        return [self._to_result(q.agent_id, results) for q, results in zip(queries, ranked)]
+
+    @staticmethod
+    def _to_result(agent_id: str, results: list[tuple[str, float]]) -> MemoryResult:
         memories = [text for text, _score in results]
         if not memories:
-            memories = [f"No relevant memories found for agent {query.agent_id}."]
-        return MemoryResult(agent_id=query.agent_id, memories=memories)
+            memories = [f"No relevant memories found for agent {agent_id}."]
+        return MemoryResult(agent_id=agent_id, memories=memories)
 
 
 # ---------------------------------------------------------------------------
@@ -120,22 +137,22 @@ class SharedWorldStateProvider:
 
     async def apply_action(self, action: AgentAction) -> AgentStateUpdate:
         # Find the agent in the shared world state and mutate in-place
-        for agent in self._world_state.agents:
-            if agent.id == action.agent_id:
-                agent.current_action = action.action_description
-                if action.target_location_id:
-                    agent.location_id = action.target_location_id
-                if action.target_x is not None:
-                    agent.x = action.target_x
-                if action.target_y is not None:
-                    agent.y = action.target_y
-                return AgentStateUpdate(
-                    agent_id=action.agent_id,
-                    new_action=agent.current_action,
-                    new_location_id=agent.location_id,
-                    new_x=agent.x,
-                    new_y=agent.y,
-                )
+        agent = self._world_state.get_agent(action.agent_id)
+        if agent is not None:
+            agent.current_action = action.action_description
+            if action.target_location_id:
+                self._world_state.move_agent(agent, action.target_location_id)
+            if action.target_x is not None:
+                agent.x = action.target_x
+            if action.target_y is not None:
+                agent.y = action.target_y
+            return AgentStateUpdate(
+                agent_id=action.agent_id,
+                new_action=agent.current_action,
+                new_location_id=agent.location_id,
+                new_x=agent.x,
+                new_y=agent.y,
+            )
 
         # Agent not found — return a passthrough result
         return AgentStateUpdate(
@@ -0,0 +1,33 @@
+"""
+Shared Gemini client.
+
+Constructing ``genai.Client`` parses config and sets up a fresh HTTP session,
+so services reuse one process-wide instance (and its connection pool) instead
+of building a client per call. The client is safe to share across threads
+and its ``.aio`` surface across coroutines.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    from google import genai
+
+_CLIENT: Optional["genai.Client"] = None
+_LOCK = threading.Lock()
+
+
+def get_client() -> "genai.Client":
+    """Return the shared Gemini client, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _LOCK:
+            if _CLIENT is None:
+                from google import genai
+
+                _CLIENT = genai.Client(api_key=settings.gemini_api_key)
+    return _CLIENT
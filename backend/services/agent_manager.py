@@ -11,15 +11,19 @@ from __future__ import annotations
 import asyncio
 import logging
 import random
+import re
+from itertools import repeat
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 from agno.agent import Agent
 from agno.team import Team, TeamMode
 
-from models.state import AgentState, EnvironmentNode, NodeType, WorldState
+from models.state import AgentState, NodeType, WorldState
 from services.agno_storage import create_agent
 from services.observability import trace_agent_action
 from services.planner import Planner
+from services.world_index import get_world_index
 from services.world_tools import WorldTools
 
 if TYPE_CHECKING:
@@ -29,6 +33,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Punctuation dropped before mood keyword matching, in one pass per text
+_PUNCT_RE = re.compile(r"[.,!?\"']")
+
 
 class AgentManager:
     """Manages Agno agents and their interaction with the world."""
@@ -46,6 +53,7 @@ class AgentManager:
         self.reflection_engine = reflection_engine
         self.planner = Planner(memory_store=memory_store)
         self.agents: dict[str, Agent] = {}
+        self._tools: dict[str, WorldTools] = {}
         self._agent_locks: dict[str, asyncio.Lock] = {}
 
     # ------------------------------------------------------------------
@@ -59,40 +67,27 @@ class AgentManager:
         Zones, rooms, and the world root are valid location containers.
         Object nodes are never used as spawn locations.  Buildings are
         skipped at the top level (they are not walkable themselves), but
-        their walkable room children are included via recursion.
+        their walkable room children are included via the tree index.
         """
+        index = get_world_index(self.world_state)
+        results: list[tuple[str, int, int]] = []
 
-        def _gather(node: EnvironmentNode) -> list[tuple[str, int, int]]:
-            results: list[tuple[str, int, int]] = []
-
+        # nodes_by_id is in tree pre-order, so rooms inside buildings are found.
+        for node in index.nodes_by_id.values():
             # Only zones, rooms, and the world root can host agents.
             is_container = node.node_type in (
                 NodeType.WORLD, NodeType.ZONE, NodeType.ROOM
             )
+            if not (is_container and node.walkable):
+                continue
 
-            if is_container and node.walkable:
-                # Tiles within this node that are covered by a non-walkable
-                # child (wall, object, building exterior, …) are blocked.
-                blocked: set[tuple[int, int]] = set()
-                for child in node.children:
-                    if not child.walkable:
-                        for cx in range(child.x, child.x + child.w):
-                            for cy in range(child.y, child.y + child.h):
-                                blocked.add((cx, cy))
-
-                # Emit every open tile.
-                for tx in range(node.x, node.x + node.w):
-                    for ty in range(node.y, node.y + node.h):
-                        if (tx, ty) not in blocked:
-                            results.append((node.id, tx, ty))
-
-            # Always recurse so rooms inside buildings are found.
-            for child in node.children:
-                results.extend(_gather(child))
+            # Tiles covered by a non-walkable child (wall, object, building
+            # exterior, …) are cleared in the node's occupancy bitmap; the
+            # transpose keeps the column-major (x outer, y inner) tile order.
+            xs, ys = np.nonzero(index.free_mask(node).T)
+            results.extend(zip(repeat(node.id), (xs + node.x).tolist(), (ys + node.y).tolist()))
 
-            return results
-
-        return _gather(self.world_state.environment_root)
+        return results
 
     def _pick_walkable_spawn(
         self,
@@ -199,7 +194,7 @@ class AgentManager:
                     chosen_x,
                     chosen_y,
                 )
-                agent_state.location_id = chosen_loc
+                self.world_state.move_agent(agent_state, chosen_loc)
                 agent_state.x = chosen_x
                 agent_state.y = chosen_y
             else:
@@ -227,6 +222,7 @@ class AgentManager:
                 tools=[tools],
             )
             self.agents[agent_state.id] = agent
+            self._tools[agent_state.id] = tools
             self._agent_locks[agent_state.id] = asyncio.Lock()
             logger.info("Initialized agent: %s (%s)", agent_state.name, agent_state.id)
 
@@ -236,16 +232,16 @@ class AgentManager:
     # Mood helpers
     # ------------------------------------------------------------------
 
-    _MOOD_POSITIVE = {
+    _MOOD_POSITIVE = frozenset({
         "love", "like", "great", "happy", "wonderful", "amazing", "good",
         "friend", "thanks", "enjoy", "glad", "nice", "kind", "welcome",
         "beautiful", "helpful", "appreciate", "excited", "joy", "fun",
-    }
-    _MOOD_NEGATIVE = {
+    })
+    _MOOD_NEGATIVE = frozenset({
         "hate", "dislike", "angry", "bad", "terrible", "awful", "annoying",
         "stupid", "ugly", "enemy", "rude", "mean", "horrible", "sad",
         "upset", "disappointed", "frustrating", "worst", "lonely", "scared",
-    }
+    })
     _MOOD_TRANSITIONS = {
         "happy": {"up": "excited", "down": "neutral"},
         "excited": {"up": "excited", "down": "happy"},
@@ -255,6 +251,14 @@ class AgentManager:
         "anxious": {"up": "neutral", "down": "sad"},
     }
 
+    @classmethod
+    def _count_mood_words(cls, text: str) -> tuple[int, int]:
+        """Count (positive, negative) mood keywords in *text*."""
+        words = _PUNCT_RE.sub("", text.lower()).split()
+        pos = sum(1 for w in words if w in cls._MOOD_POSITIVE)
+        neg = sum(1 for w in words if w in cls._MOOD_NEGATIVE)
+        return pos, neg
+
     def _update_mood(
         self, agent_state: AgentState, response_text: str, pending_messages: list[dict]
     ) -> None:
@@ -267,15 +271,11 @@ class AgentManager:
            messages from close friends amplify positivity
         """
         # Score the agent's own response
-        own_words = response_text.lower().split()
-        pos = sum(1 for w in own_words if w.strip(".,!?\"'") in self._MOOD_POSITIVE)
-        neg = sum(1 for w in own_words if w.strip(".,!?\"'") in self._MOOD_NEGATIVE)
+        pos, neg = self._count_mood_words(response_text)
 
         # Score incoming messages with relationship weighting
         for msg in pending_messages:
-            msg_words = msg.get("message", "").lower().split()
-            msg_pos = sum(1 for w in msg_words if w.strip(".,!?\"'") in self._MOOD_POSITIVE)
-            msg_neg = sum(1 for w in msg_words if w.strip(".,!?\"'") in self._MOOD_NEGATIVE)
+            msg_pos, msg_neg = self._count_mood_words(msg.get("message", ""))
 
             # Weight by relationship: messages from close friends boost positivity,
             # messages from rivals/enemies boost negativity
@@ -355,6 +355,16 @@ class AgentManager:
                 # Fire-and-forget reflection generation
                 asyncio.ensure_future(self._run_reflection(agent_id))
 
+    async def _flush_tool_memories(self, agent_id: str) -> None:
+        """Write the memories an agent's tools queued during its run."""
+        tools = self._tools.get(agent_id)
+        if tools is None:
+            return
+        try:
+            await asyncio.to_thread(tools.flush_memories)
+        except Exception as e:
+            logger.warning("Failed to flush tool memories for %s: %s", agent_id, e)
+
     async def _run_reflection(self, agent_id: str) -> None:
         """Run reflection generation in the background."""
         if self.reflection_engine is None:
@@ -362,7 +372,7 @@ class AgentManager:
         agent_state = self._get_agent_state(agent_id)
         name = agent_state.name if agent_state else agent_id
         try:
-            reflections = self.reflection_engine.generate_reflections(agent_id, name)
+            reflections = await self.reflection_engine.generate_reflections_async(agent_id, name)
             logger.info("Generated %d reflections for %s", len(reflections), agent_id)
         except Exception as e:
             logger.warning("Reflection failed for %s: %s", agent_id, e)
@@ -371,15 +381,15 @@ class AgentManager:
     # Planning helpers
     # ------------------------------------------------------------------
 
-    def _ensure_plan(self, agent_state: AgentState) -> None:
-        """Generate a plan if the agent doesn't have one or has exhausted it."""
-        needs_plan = (
+    @staticmethod
+    def _needs_plan(agent_state: AgentState) -> bool:
+        return (
             agent_state.daily_plan is None
             or agent_state.current_plan_step >= len(agent_state.daily_plan)
         )
-        if not needs_plan:
-            return
 
+    def _plan_request(self, agent_state: AgentState) -> dict:
+        """Collect the ``Planner.generate_plan`` arguments for an agent."""
         # Retrieve top-3 reflection memories for planning context
         reflection_context = ""
         if self.memory_store is not None:
@@ -394,15 +404,41 @@ class AgentManager:
         if self.social_graph is not None:
             relationship_context = self.social_graph.format_for_prompt(agent_state.id)
 
-        steps = self.planner.generate_plan(
-            agent_id=agent_state.id,
-            name=agent_state.name,
-            persona=agent_state.description,
-            location=agent_state.location_id,
-            reflection_context=reflection_context,
-            mood=agent_state.mood,
-            relationship_context=relationship_context,
-        )
+        return {
+            "agent_id": agent_state.id,
+            "name": agent_state.name,
+            "persona": agent_state.description,
+            "location": agent_state.location_id,
+            "reflection_context": reflection_context,
+            "mood": agent_state.mood,
+            "relationship_context": relationship_context,
+        }
+
+    def _ensure_plan(self, agent_state: AgentState) -> None:
+        """Generate a plan if the agent doesn't have one or has exhausted it."""
+        if not self._needs_plan(agent_state):
+            return
+        steps = self.planner.generate_plan(**self._plan_request(agent_state))
+        self._apply_plan(agent_state, steps)
+
+    async def _ensure_plans_bulk(self) -> None:
+        """Generate plans concurrently for every agent that needs one."""
+        requests = [
+            self._plan_request(state)
+            for aid in self.agents
+            if (state := self._get_agent_state(aid)) is not None
+            and self._needs_plan(state)
+        ]
+        if not requests:
+            return
+        plans = await self.planner.generate_plans_bulk(requests)
+        for agent_id, steps in plans.items():
+            agent_state = self._get_agent_state(agent_id)
+            if agent_state is not None:
+                self._apply_plan(agent_state, steps)
+
+    def _apply_plan(self, agent_state: AgentState, steps: list[str]) -> None:
+        """Install a freshly generated plan and record it as a memory."""
         agent_state.daily_plan = steps
         agent_state.current_plan_step = 0
 
@@ -464,7 +500,10 @@ class AgentManager:
                 f"{memory_context}"
             )
 
-            result = await agent.arun(prompt)
+            try:
+                result = await agent.arun(prompt)
+            finally:
+                await self._flush_tool_memories(agent_id)
             content = result.content if result and result.content else "(no response)"
             self._record_response(agent_id, f"Visitor said: \"{message}\". I responded: {content}", "agent_response")
             return content
@@ -495,7 +534,10 @@ class AgentManager:
                 f"{memory_context}"
             )
 
-            result = await agent.arun(prompt)
+            try:
+                result = await agent.arun(prompt)
+            finally:
+                await self._flush_tool_memories(agent_id)
             content = result.content if result and result.content else "(no response)"
             self._record_response(agent_id, f"Inner voice urged: \"{command}\". I did: {content}", "agent_response")
             return content
@@ -541,13 +583,14 @@ class AgentManager:
             location = agent_state.location_id
             self._ensure_plan(agent_state)
 
-        # Process pending messages — snapshot and clear atomically
-        pending = self.world_state.pending_messages.pop(agent_id, [])
+        # Process pending messages — snapshot and clear atomically, sorted by
+        # timestamp so messages are processed in causal order
+        pending = sorted(
+            self.world_state.pending_messages.pop(agent_id, ()),
+            key=lambda m: m.get("timestamp", 0),
+        )
         incoming_block = ""
         if pending:
-            # Sort by timestamp so messages are processed in causal order
-            pending.sort(key=lambda m: m.get("timestamp", 0))
-
             lines = ["\n[INCOMING MESSAGES] You received these messages:"]
             for msg in pending:
                 lines.append(f"  - {msg['from_name']} said: \"{msg['message']}\"")
@@ -607,7 +650,10 @@ class AgentManager:
         )
 
         try:
-            result = await agent.arun(prompt)
+            try:
+                result = await agent.arun(prompt)
+            finally:
+                await self._flush_tool_memories(agent_id)
             content = result.content if result and result.content else ""
             action = agent_state.current_action if agent_state else "unknown"
 
@@ -647,6 +693,9 @@ class AgentManager:
         """
         results: list[dict] = []
 
+        # Agents that re-plan this cycle do so concurrently, up front
+        await self._ensure_plans_bulk()
+
         # First pass — tick every agent in order
         for aid in self.agents:
             result = await self.tick_agent(aid)
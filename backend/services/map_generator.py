@@ -12,8 +12,8 @@ import json
 import logging
 from typing import Optional
 
-from core.config import settings
 from models.state import EnvironmentNode, WorldState
+from services._genai_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -119,10 +119,7 @@ class MapGenerator:
         )
 
         try:
-            from google import genai
-
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+            response = get_client().models.generate_content(
                 model="gemini-2.5-flash",
                 contents=prompt,
                 config={
@@ -159,6 +156,7 @@ class MapGenerator:
             # Append to world
             root.children.append(new_node)
             world_state.expansion_count += 1
+            world_state.mark_structure_changed()
 
             logger.info(
                 "Expanded world %s: new zone '%s' at (%d,%d) %dx%d",
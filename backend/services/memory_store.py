@@ -10,17 +10,24 @@ Retrieval uses a composite score: alpha * relevance + beta * recency + gamma * i
 
 from __future__ import annotations
 
+import base64
+import heapq
 import logging
-import math
+import queue
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
+import numpy as np
 from llama_index.core import StorageContext, VectorStoreIndex, load_index_from_storage
-from llama_index.core.schema import TextNode
+from llama_index.core.schema import MetadataMode, QueryBundle, TextNode
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 
 from core.config import settings
+from services._genai_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +45,90 @@ def _get_embed_model() -> GoogleGenAIEmbedding:
     return _embed_model
 
 
+RerankFn = Callable[[np.ndarray, np.ndarray, np.ndarray, float], np.ndarray]
+
+_reranker: Optional[RerankFn] = None
+
+
+def _build_reranker() -> RerankFn:
+    """Build the composite-score kernel with the scoring settings baked in.
+
+    The weights and half-life are fixed after startup, so they are folded
+    into closure constants once instead of re-read from settings per call.
+    """
+    global _reranker
+    alpha = settings.memory_relevance_weight
+    beta = settings.memory_recency_weight
+    gamma_per_point = settings.memory_importance_weight / 10.0
+    half_life_seconds = settings.memory_recency_half_life_hours * 3600.0
+    decay = -0.693 / half_life_seconds if half_life_seconds > 0 else None
+
+    def _rerank(ts: np.ndarray, imp: np.ndarray, rel: np.ndarray, now: float) -> np.ndarray:
+        composite = alpha * rel + gamma_per_point * imp
+        if decay is not None:
+            composite += beta * np.exp(np.maximum(now - ts, 0.0) * decay)
+        return composite
+
+    _reranker = _rerank
+    return _reranker
+
+
+def _get_reranker() -> RerankFn:
+    return _reranker if _reranker is not None else _build_reranker()
+
+
+# Runs importance ratings concurrently with the embedding call in add_memory
+_rating_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-rating")
+
+_IMPORTANCE_PROMPT = (
+    "On a scale of 1 to 10, where 1 is mundane (e.g., eating breakfast) "
+    "and 10 is extraordinary (e.g., a fire in town, a death, a major life change), "
+    "rate the importance of the following memory. "
+    "Respond with ONLY a single integer.\n\n"
+    "Memory: {text}"
+)
+_IMPORTANCE_RE = re.compile(r"\s*(10|[1-9])")
+
+# Metadata key holding the L2-normalized fp16 embedding (base64) cached at insert
+EMB_NORM_KEY = "emb_norm"
+
+
+def _encode_unit_embedding(embedding: list[float]) -> str:
+    """L2-normalize an embedding and pack it as base64-encoded fp16."""
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec = vec / norm
+    return base64.b64encode(vec.astype(np.float16).tobytes()).decode("ascii")
+
+
+def _decode_unit_embedding(blob: str) -> np.ndarray:
+    """Inverse of _encode_unit_embedding."""
+    return np.frombuffer(base64.b64decode(blob), dtype=np.float16)
+
+
+def _ann_candidates(
+    unit: np.ndarray, threshold: float, k: int
+) -> Optional[list[np.ndarray]]:
+    """Find, per row, the neighbours with cosine similarity >= threshold via FAISS HNSW.
+
+    Only the top-k approximate neighbours of each row are verified, so the
+    cost is O(N·k) instead of the O(N²) dense Gram matrix. Returns None if
+    faiss is not installed.
+    """
+    try:
+        import faiss
+    except ImportError:
+        logger.debug("faiss not installed — using dense similarity for consolidation")
+        return None
+
+    index = faiss.IndexHNSWFlat(unit.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+    index.add(unit)
+    scores, ids = index.search(unit, min(k + 1, len(unit)))
+    keep = (scores >= threshold) & (ids >= 0)
+    return [np.sort(ids[i][keep[i]]) for i in range(len(unit))]
+
+
 class AgentMemoryIndex:
     """Wraps a single agent's VectorStoreIndex with importance scoring."""
 
@@ -46,6 +137,8 @@ class AgentMemoryIndex:
         self.persist_dir = persist_dir
         self._insert_count = 0
         self.last_importance: int = 5
+        # Guards docstore mutation against the background persist thread
+        self._lock = threading.RLock()
 
         embed_model = _get_embed_model()
 
@@ -67,102 +160,170 @@ class AgentMemoryIndex:
         10 = extraordinary (fire, death, major life event)
         """
         try:
-            from google import genai
-
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+            response = get_client().models.generate_content(
                 model=settings.memory_importance_model,
-                contents=(
-                    "On a scale of 1 to 10, where 1 is mundane (e.g., eating breakfast) "
-                    "and 10 is extraordinary (e.g., a fire in town, a death, a major life change), "
-                    "rate the importance of the following memory. "
-                    "Respond with ONLY a single integer.\n\n"
-                    f"Memory: {text}"
-                ),
+                contents=_IMPORTANCE_PROMPT.format(text=text),
                 config={
-                    "max_output_tokens": 4,
+                    # Room for "10" split across tokens plus stray whitespace;
+                    # a tighter budget truncates the rating to nothing
+                    "max_output_tokens": 8,
                     "temperature": 0.0,
                 },
             )
-            score = int(response.text.strip())
-            return max(1, min(10, score))
+            match = _IMPORTANCE_RE.match(response.text or "")
+            if match is None:
+                logger.warning("Unparseable importance rating %r — defaulting to 5", response.text)
+                return 5
+            return int(match.group(1))
         except Exception as e:
             logger.warning("Importance rating failed: %s — defaulting to 5", e)
             return 5
 
     def add_memory(self, text: str, metadata: Optional[dict] = None) -> int:
         """Insert a memory into this agent's index. Returns importance score."""
-        importance = self._rate_importance_sync(text)
-        self.last_importance = importance
-
         node_metadata = {
             "agent_id": self.agent_id,
             "timestamp": time.time(),
-            "importance": importance,
         }
         if metadata:
             node_metadata.update(metadata)
 
-        node = TextNode(text=text, metadata=node_metadata)
-        self.index.insert_nodes([node])
+        # The rating and embedding calls are independent — overlap them
+        rating = _rating_executor.submit(self._rate_importance_sync, text)
+        try:
+            node = self._build_node(text, node_metadata)
+        finally:
+            importance = rating.result()
+        self.last_importance = importance
+        node.metadata.setdefault("importance", importance)
+
+        with self._lock:
+            self.index.insert_nodes([node])
         self._insert_count += 1
         return importance
 
-    def retrieve(self, query: str, top_k: int = 5) -> list[tuple[str, float, dict]]:
+    def add_memories(self, items: list[dict]) -> list[int]:
+        """Insert several memories with one batched embedding request.
+
+        Each item is ``{"text": str, "metadata": dict | None}``. Items whose
+        metadata already carries an importance are not re-rated. Returns the
+        importance of each item.
+        """
+        if not items:
+            return []
+        now = time.time()
+        texts = [item["text"] for item in items]
+        metadatas = []
+        for item in items:
+            node_metadata = {"agent_id": self.agent_id, "timestamp": now}
+            node_metadata.update(item.get("metadata") or {})
+            metadatas.append(node_metadata)
+
+        ratings = [
+            None if "importance" in meta else _rating_executor.submit(self._rate_importance_sync, text)
+            for text, meta in zip(texts, metadatas)
+        ]
+        try:
+            nodes = self._build_nodes(texts, metadatas)
+        finally:
+            importances = [
+                meta["importance"] if rating is None else rating.result()
+                for meta, rating in zip(metadatas, ratings)
+            ]
+        for node, importance in zip(nodes, importances):
+            node.metadata.setdefault("importance", importance)
+        self.last_importance = importances[-1]
+
+        with self._lock:
+            self.index.insert_nodes(nodes)
+        self._insert_count += len(nodes)
+        return importances
+
+    @staticmethod
+    def _new_node(text: str, metadata: dict) -> TextNode:
+        return TextNode(
+            text=text,
+            metadata=metadata,
+            excluded_embed_metadata_keys=[EMB_NORM_KEY, "importance", "base_importance"],
+            excluded_llm_metadata_keys=[EMB_NORM_KEY, "base_importance"],
+        )
+
+    def _build_nodes(self, texts: list[str], metadatas: list[dict]) -> list[TextNode]:
+        """Batched ``_build_node``: one embedding request for all texts."""
+        nodes = [self._new_node(t, m) for t, m in zip(texts, metadatas)]
+        embeddings = _get_embed_model().get_text_embedding_batch(
+            [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        )
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+            node.metadata[EMB_NORM_KEY] = _encode_unit_embedding(embedding)
+        return nodes
+
+    def _build_node(self, text: str, metadata: dict) -> TextNode:
+        """Create a TextNode with its embedding computed up front.
+
+        The unit-normalized fp16 copy of the embedding is cached in the node's
+        metadata so consolidation can cluster with a plain dot product.
+        Inserting a node whose embedding is already set skips re-embedding.
+        Importance is left out of the embedded text: it is rated concurrently
+        and decays over time.
+        """
+        node = self._new_node(text, metadata)
+        embedding = _get_embed_model().get_text_embedding(
+            node.get_content(metadata_mode=MetadataMode.EMBED)
+        )
+        node.embedding = embedding
+        node.metadata[EMB_NORM_KEY] = _encode_unit_embedding(embedding)
+        return node
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        embedding: Optional[list[float]] = None,
+    ) -> list[tuple[str, float, dict]]:
         """Return top-K memories re-ranked by composite score.
 
         Fetches top_k*3 candidates from vector search, then re-ranks using:
             composite = alpha * relevance + beta * recency + gamma * importance
 
+        If ``embedding`` is given it is used as the query vector instead of
+        embedding ``query`` again.
+
         Returns list of (text, composite_score, metadata) tuples.
         """
-        alpha = settings.memory_relevance_weight
-        beta = settings.memory_recency_weight
-        gamma = settings.memory_importance_weight
-        half_life_seconds = settings.memory_recency_half_life_hours * 3600.0
-
         candidates_k = top_k * 3
         retriever = self.index.as_retriever(similarity_top_k=candidates_k)
-        results = retriever.retrieve(query)
+        results = retriever.retrieve(QueryBundle(query_str=query, embedding=embedding))
+        if not results:
+            return []
 
         now = time.time()
-        scored: list[tuple[str, float, dict]] = []
-
-        for node in results:
-            text = node.get_text()
-            relevance = node.get_score() or 0.0
-            meta = node.node.metadata if node.node else {}
+        n = len(results)
+        texts = [node.get_text() for node in results]
+        metas = [node.node.metadata if node.node else {} for node in results]
 
-            timestamp = meta.get("timestamp", now)
-            age_seconds = max(0.0, now - timestamp)
-            recency = math.exp(-0.693 * age_seconds / half_life_seconds) if half_life_seconds > 0 else 0.0
-
-            importance_raw = meta.get("importance", 5)
-            importance = importance_raw / 10.0
-
-            composite = alpha * relevance + beta * recency + gamma * importance
-            scored.append((text, composite, meta))
+        ts = np.fromiter((m.get("timestamp", now) for m in metas), dtype=np.float64, count=n)
+        imp = np.fromiter((m.get("importance", 5) for m in metas), dtype=np.float64, count=n)
+        rel = np.fromiter((node.get_score() or 0.0 for node in results), dtype=np.float64, count=n)
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[:top_k]
+        composite = _get_reranker()(ts, imp, rel, now)
+        order = np.argsort(-composite, kind="stable")[:top_k]
+        return [(texts[i], float(composite[i]), metas[i]) for i in order]
 
     def retrieve_recent(self, count: int = 100) -> list[tuple[str, dict]]:
         """Retrieve the most recent memories by timestamp.
 
         Used by the reflection engine. Returns (text, metadata) tuples.
         """
-        retriever = self.index.as_retriever(similarity_top_k=count)
-        # Use a generic query to get candidates, then sort by timestamp
-        results = retriever.retrieve("recent events and observations")
-
-        items: list[tuple[str, dict, float]] = []
-        for node in results:
-            meta = node.node.metadata if node.node else {}
-            ts = meta.get("timestamp", 0.0)
-            items.append((node.get_text(), meta, ts))
-
-        items.sort(key=lambda x: x[2], reverse=True)
-        return [(text, meta) for text, meta, _ in items[:count]]
+        docstore = self.index.storage_context.docstore
+        # Read straight from the docstore — no embedding or vector scan needed
+        top = heapq.nlargest(
+            count,
+            docstore.docs.values(),
+            key=lambda node: node.metadata.get("timestamp", 0.0),
+        )
+        return [(node.get_content(), node.metadata) for node in top]
 
     def get_memory_count(self) -> int:
         """Count nodes in the docstore."""
@@ -182,18 +343,29 @@ class AgentMemoryIndex:
         decay_rate = settings.memory_decay_rate_per_day
         prune_threshold = settings.memory_prune_importance_threshold
         to_delete: list[str] = []
+        updated: list = []
 
-        for doc_id, node in list(docstore.docs.items()):
+        # docstore.docs deserializes a fresh dict on every access, so iterate
+        # it directly and write decayed nodes back explicitly.
+        for doc_id, node in docstore.docs.items():
             meta = node.metadata if hasattr(node, "metadata") else {}
             category = meta.get("category", "")
             if category in ("reflection", "consolidated"):
                 continue
 
-            importance = meta.get("importance", 5)
+            # Decay is a function of total age, so it is always computed from
+            # the importance the memory was rated with, not the last sweep's
+            base = meta.get("base_importance")
+            if base is None:
+                base = meta.get("importance", 5)
+                meta["base_importance"] = base
+                for keys in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+                    if "base_importance" not in keys:
+                        keys.append("base_importance")
             timestamp = meta.get("timestamp", now)
             age_days = (now - timestamp) / 86400.0
 
-            decayed = importance - (decay_rate * age_days * importance)
+            decayed = base - (decay_rate * age_days * base)
             decayed = max(0.0, decayed)
 
             if decayed < prune_threshold:
@@ -201,12 +373,16 @@ class AgentMemoryIndex:
             else:
                 meta["importance"] = decayed
                 node.metadata = meta
+                updated.append(node)
 
-        for doc_id in to_delete:
-            try:
-                docstore.delete_document(doc_id)
-            except Exception:
-                pass
+        with self._lock:
+            if updated:
+                docstore.add_documents(updated, allow_update=True)
+            for doc_id in to_delete:
+                try:
+                    docstore.delete_document(doc_id)
+                except Exception:
+                    pass
 
         logger.info("Decay/prune for %s: pruned %d memories", self.agent_id, len(to_delete))
         return len(to_delete)
@@ -217,67 +393,72 @@ class AgentMemoryIndex:
         Triggered when memory count exceeds the cap. Returns count of memories reduced.
         """
         docstore = self.index.storage_context.docstore
-        all_docs = list(docstore.docs.items())
-        total = len(all_docs)
+        docs = docstore.docs
+        total = len(docs)
 
         if total <= settings.memory_max_per_agent:
             return 0
 
-        # Sort by timestamp, separate short-term buffer
-        doc_items: list[tuple[str, any]] = []
-        for doc_id, node in all_docs:
+        # Single pass into parallel arrays, then sort by timestamp
+        doc_ids = np.empty(total, dtype=object)
+        nodes = np.empty(total, dtype=object)
+        timestamps = np.empty(total, dtype=np.float64)
+        for i, (doc_id, node) in enumerate(docs.items()):
             meta = node.metadata if hasattr(node, "metadata") else {}
-            ts = meta.get("timestamp", 0.0)
-            doc_items.append((doc_id, node, ts))
+            doc_ids[i] = doc_id
+            nodes[i] = node
+            timestamps[i] = meta.get("timestamp", 0.0)
 
-        doc_items.sort(key=lambda x: x[2], reverse=True)
-
-        buffer_size = settings.memory_short_term_buffer
-        short_term = doc_items[:buffer_size]
-        long_term = doc_items[buffer_size:]
+        # Newest first; the first memory_short_term_buffer stay untouched
+        order = np.argsort(-timestamps, kind="stable")
+        long_term = order[settings.memory_short_term_buffer:]
 
         if len(long_term) < settings.memory_consolidation_cluster_size:
             return 0
 
-        # Embed long-term memories for clustering
-        embed_model = _get_embed_model()
-        texts = []
-        lt_ids = []
-        for doc_id, node, _ts in long_term:
-            text = node.get_content() if hasattr(node, "get_content") else str(node)
-            texts.append(text)
-            lt_ids.append(doc_id)
-
-        try:
-            embeddings = embed_model.get_text_embedding_batch(texts)
-        except Exception as e:
-            logger.warning("Embedding batch failed during consolidation: %s", e)
+        # Collect long-term memories for clustering
+        lt_nodes = nodes[long_term].tolist()
+        lt_ids = doc_ids[long_term].tolist()
+        texts = [
+            node.get_content() if hasattr(node, "get_content") else str(node)
+            for node in lt_nodes
+        ]
+        node_ids = [
+            getattr(node, "node_id", doc_id) for node, doc_id in zip(lt_nodes, lt_ids)
+        ]
+
+        normed = self._get_unit_embeddings(lt_nodes, node_ids, texts)
+        if normed is None:
             return 0
 
-        # Greedy clustering by cosine similarity
-        import numpy as np
+        # Greedy clustering by cosine similarity. Rows are unit-norm, so the
+        # Gram matrix is the cosine similarity matrix directly; large sets
+        # only verify the ANN candidate pairs instead.
+        unit = np.ascontiguousarray(normed, dtype=np.float32)
+        n = len(texts)
+        threshold = settings.memory_consolidation_similarity_threshold
 
-        emb_array = np.array(embeddings)
-        norms = np.linalg.norm(emb_array, axis=1, keepdims=True)
-        norms = np.where(norms == 0, 1, norms)
-        normed = emb_array / norms
+        neighbors = None
+        if n >= settings.memory_consolidation_ann_min_size:
+            neighbors = _ann_candidates(
+                unit, threshold, settings.memory_consolidation_ann_neighbors
+            )
+        sim = unit @ unit.T if neighbors is None else None
 
-        assigned = [False] * len(texts)
+        assigned = np.zeros(n, dtype=bool)
         clusters: list[list[int]] = []
-        threshold = settings.memory_consolidation_similarity_threshold
 
-        for i in range(len(texts)):
+        for i in range(n):
             if assigned[i]:
                 continue
-            cluster = [i]
+            if neighbors is None:
+                members = np.flatnonzero((sim[i, i + 1:] >= threshold) & ~assigned[i + 1:]) + i + 1
+            else:
+                candidates = neighbors[i]
+                members = candidates[(candidates > i) & ~assigned[candidates]]
             assigned[i] = True
-            for j in range(i + 1, len(texts)):
-                if assigned[j]:
-                    continue
-                sim = float(np.dot(normed[i], normed[j]))
-                if sim >= threshold:
-                    cluster.append(j)
-                    assigned[j] = True
+            assigned[members] = True
+            cluster = [i, *members.tolist()]
             if len(cluster) >= settings.memory_consolidation_cluster_size:
                 clusters.append(cluster)
 
@@ -289,24 +470,29 @@ class AgentMemoryIndex:
             if not summary:
                 continue
 
-            # Delete originals
-            for idx in cluster_indices:
-                try:
-                    docstore.delete_document(lt_ids[idx])
-                except Exception:
-                    pass
-
-            # Insert consolidated memory
-            consolidated_node = TextNode(
-                text=summary,
-                metadata={
-                    "agent_id": self.agent_id,
-                    "timestamp": time.time(),
-                    "importance": 6,  # boosted +1 from default 5
-                    "category": "consolidated",
-                },
-            )
-            self.index.insert_nodes([consolidated_node])
+            try:
+                consolidated_node = self._build_node(
+                    summary,
+                    {
+                        "agent_id": self.agent_id,
+                        "timestamp": time.time(),
+                        "importance": 6,  # boosted +1 from default 5
+                        "category": "consolidated",
+                    },
+                )
+            except Exception as e:
+                logger.warning("Embedding consolidated memory failed: %s", e)
+                continue
+            with self._lock:
+                # Delete originals
+                for idx in cluster_indices:
+                    try:
+                        docstore.delete_document(lt_ids[idx])
+                    except Exception:
+                        pass
+
+                # Insert consolidated memory
+                self.index.insert_nodes([consolidated_node])
             reduced += len(cluster_indices) - 1  # net reduction
 
         logger.info(
@@ -315,14 +501,76 @@ class AgentMemoryIndex:
         )
         return reduced
 
+    def _get_unit_embeddings(
+        self, nodes: list, node_ids: list[str], texts: list[str]
+    ) -> Optional[np.ndarray]:
+        """Return an (N, d) fp16 matrix of unit-norm embeddings for the given nodes.
+
+        Uses the copy cached in each node's metadata; nodes inserted before
+        that cache existed are normalized once here and backfilled.
+        """
+        rows: list[Optional[np.ndarray]] = [
+            _decode_unit_embedding(node.metadata[EMB_NORM_KEY])
+            if EMB_NORM_KEY in node.metadata else None
+            for node in nodes
+        ]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            embeddings = self._get_stored_embeddings(
+                [node_ids[i] for i in missing], [texts[i] for i in missing]
+            )
+            if embeddings is None:
+                return None
+            for i, emb in zip(missing, embeddings):
+                blob = _encode_unit_embedding(emb)
+                nodes[i].metadata[EMB_NORM_KEY] = blob
+                nodes[i].excluded_embed_metadata_keys.append(EMB_NORM_KEY)
+                nodes[i].excluded_llm_metadata_keys.append(EMB_NORM_KEY)
+                rows[i] = _decode_unit_embedding(blob)
+
+            with self._lock:
+                self.index.storage_context.docstore.add_documents(
+                    [nodes[i] for i in missing], allow_update=True
+                )
+
+        return np.stack(rows)
+
+    def _get_stored_embeddings(
+        self, node_ids: list[str], texts: list[str]
+    ) -> Optional[list[list[float]]]:
+        """Look up embeddings computed at insert time from the vector store.
+
+        Only nodes missing from the vector store are re-embedded via Gemini.
+        Returns None if that fallback batch fails.
+        """
+        vector_store = self.index.vector_store
+        data = getattr(vector_store, "data", None) or getattr(vector_store, "_data", None)
+        embedding_dict: dict = getattr(data, "embedding_dict", None) or {}
+
+        embeddings: list[Optional[list[float]]] = [
+            embedding_dict.get(node_id) for node_id in node_ids
+        ]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if not missing:
+            return embeddings  # type: ignore[return-value]
+
+        try:
+            fresh = _get_embed_model().get_text_embedding_batch(
+                [texts[i] for i in missing]
+            )
+        except Exception as e:
+            logger.warning("Embedding batch failed during consolidation: %s", e)
+            return None
+
+        for i, emb in zip(missing, fresh):
+            embeddings[i] = emb
+        return embeddings  # type: ignore[return-value]
+
     def _summarize_cluster(self, texts: list[str]) -> str:
         """Summarize a cluster of similar memories into one paragraph via Gemini."""
         try:
-            from google import genai
-
             combined = "\n".join(f"- {t}" for t in texts)
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+            response = get_client().models.generate_content(
                 model=settings.memory_importance_model,
                 contents=(
                     "Consolidate these related memories into a single concise paragraph "
@@ -342,12 +590,17 @@ class AgentMemoryIndex:
 
     def persist(self) -> None:
         """Save the index to disk."""
-        self.persist_dir.mkdir(parents=True, exist_ok=True)
-        self.index.storage_context.persist(persist_dir=str(self.persist_dir))
+        with self._lock:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+            self.index.storage_context.persist(persist_dir=str(self.persist_dir))
 
 
 class MemoryStore:
-    """Manages all agents' memory indexes."""
+    """Manages all agents' memory indexes.
+
+    Periodic persists are handed to a background write-behind thread so
+    JSON serialization never blocks the insert path.
+    """
 
     AUTO_PERSIST_INTERVAL = 50  # persist every N inserts per agent
 
@@ -355,14 +608,58 @@ class MemoryStore:
         self._persist_base = Path(persist_base or settings.memory_persist_dir)
         self._indexes: dict[str, AgentMemoryIndex] = {}
 
+        self._persist_queue: queue.Queue[str] = queue.Queue()
+        self._persist_pending: set[str] = set()
+        self._persist_pending_lock = threading.Lock()
+        self._persist_thread = threading.Thread(
+            target=self._persist_worker, name="memory-persist", daemon=True
+        )
+        self._persist_thread.start()
+
+    def _persist_worker(self) -> None:
+        """Drain the persist queue, saving each agent's index off the caller's thread."""
+        while True:
+            agent_id = self._persist_queue.get()
+            try:
+                with self._persist_pending_lock:
+                    self._persist_pending.discard(agent_id)
+                idx = self._indexes.get(agent_id)
+                if idx is not None:
+                    idx.persist()
+                    logger.debug("Auto-persisted memory index for %s", agent_id)
+            except Exception as e:
+                logger.warning("Background persist failed for %s: %s", agent_id, e)
+            finally:
+                self._persist_queue.task_done()
+
+    def _schedule_persist(self, agent_id: str) -> None:
+        """Queue a background persist, skipping agents already waiting in the queue."""
+        with self._persist_pending_lock:
+            if agent_id in self._persist_pending:
+                return
+            self._persist_pending.add(agent_id)
+        self._persist_queue.put(agent_id)
+
+    def flush(self) -> None:
+        """Block until all queued background persists have completed."""
+        self._persist_queue.join()
+
     def _get_index(self, agent_id: str) -> Optional[AgentMemoryIndex]:
         return self._indexes.get(agent_id)
 
     def initialize(self, agent_ids: list[str]) -> None:
-        """Load or create memory indexes for the given agent IDs."""
-        for agent_id in agent_ids:
-            persist_dir = self._persist_base / agent_id
-            self._indexes[agent_id] = AgentMemoryIndex(agent_id, persist_dir)
+        """Load or create memory indexes for the given agent IDs.
+
+        Indexes load in parallel so per-agent disk reads and JSON parsing overlap.
+        """
+        if agent_ids:
+            with ThreadPoolExecutor(max_workers=min(32, len(agent_ids))) as pool:
+                loaded = pool.map(
+                    lambda aid: (aid, AgentMemoryIndex(aid, self._persist_base / aid)),
+                    agent_ids,
+                )
+                self._indexes.update(loaded)
+        _build_reranker()
         logger.info("Memory store initialized for %d agents", len(agent_ids))
 
     def add_memory(
@@ -377,18 +674,40 @@ class MemoryStore:
         importance = idx.add_memory(text, metadata)
 
         if idx._insert_count % self.AUTO_PERSIST_INTERVAL == 0:
-            idx.persist()
-            logger.debug("Auto-persisted memory index for %s", agent_id)
-
             # Check if consolidation is needed
             if idx.get_memory_count() > settings.memory_max_per_agent:
                 logger.info("Memory cap exceeded for %s — running maintenance", agent_id)
                 idx.decay_and_prune()
                 idx.consolidate()
-                idx.persist()
+
+            self._schedule_persist(agent_id)
 
         return importance
 
+    def add_memories(self, agent_id: str, items: list[dict]) -> list[int]:
+        """Add several memories for an agent in one batch. Returns importances.
+
+        Each item is ``{"text": str, "metadata": dict | None}``.
+        """
+        idx = self._indexes.get(agent_id)
+        if idx is None:
+            logger.warning("No memory index for agent %s — skipping", agent_id)
+            return [5] * len(items)
+
+        before = idx._insert_count
+        importances = idx.add_memories(items)
+
+        # Same auto-persist cadence as add_memory, if the batch crossed a boundary
+        if before // self.AUTO_PERSIST_INTERVAL != idx._insert_count // self.AUTO_PERSIST_INTERVAL:
+            if idx.get_memory_count() > settings.memory_max_per_agent:
+                logger.info("Memory cap exceeded for %s — running maintenance", agent_id)
+                idx.decay_and_prune()
+                idx.consolidate()
+
+            self._schedule_persist(agent_id)
+
+        return importances
+
     def retrieve(
         self, agent_id: str, query: str, top_k: int = 5
     ) -> list[tuple[str, float]]:
@@ -399,6 +718,45 @@ class MemoryStore:
         ranked = idx.retrieve(query, top_k)
         return [(text, score) for text, score, _meta in ranked]
 
+    def retrieve_batch(
+        self, agent_id: str, queries: list[str], top_k: int = 5
+    ) -> list[list[tuple[str, float]]]:
+        """Retrieve top-K memories for several queries at once.
+
+        All queries are embedded in a single batched request; each vector
+        search then runs locally against the agent's index.
+        """
+        return self.retrieve_many([(agent_id, q, top_k) for q in queries])
+
+    def retrieve_many(
+        self, queries: list[tuple[str, str, int]]
+    ) -> list[list[tuple[str, float]]]:
+        """Retrieve memories for (agent_id, query, top_k) triples across agents.
+
+        Every query whose agent has an index is embedded in one batched
+        request; results keep the order of ``queries``.
+        """
+        results: list[list[tuple[str, float]]] = [[] for _ in queries]
+        live = [
+            (i, idx, query, top_k)
+            for i, (agent_id, query, top_k) in enumerate(queries)
+            if (idx := self._indexes.get(agent_id)) is not None
+        ]
+        if not live:
+            return results
+        try:
+            embeddings = _get_embed_model().get_text_embedding_batch(
+                [query for _, _, query, _ in live]
+            )
+        except Exception as e:
+            logger.warning("Batch query embedding failed for %d queries: %s", len(live), e)
+            return results
+        for (i, idx, query, top_k), emb in zip(live, embeddings):
+            results[i] = [
+                (text, score) for text, score, _meta in idx.retrieve(query, top_k, emb)
+            ]
+        return results
+
     def retrieve_recent(
         self, agent_id: str, count: int = 100
     ) -> list[tuple[str, dict]]:
@@ -430,6 +788,7 @@ class MemoryStore:
 
     def persist_all(self) -> None:
         """Persist all agent indexes to disk."""
+        self.flush()
         for agent_id, idx in self._indexes.items():
             idx.persist()
             logger.info("Persisted memory index for %s", agent_id)
@@ -10,20 +10,60 @@ Falls back gracefully if Neo4j is unavailable.
 
 from __future__ import annotations
 
+import bisect
 import logging
 import time
+import uuid
 from dataclasses import dataclass, field
 from typing import Optional
 
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable, AuthError
+from neo4j import GraphDatabase, RoutingControl
+from neo4j.exceptions import ServiceUnavailable, AuthError, ClientError
 
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Strength bands for prompt text: bisect_right over the thresholds picks
+# the description (< 0.2, < 0.4, < 0.7, otherwise).
+_STRENGTH_THRESHOLDS = (0.2, 0.4, 0.7)
+_STRENGTH_DESCS = ("barely know", "somewhat know", "know well", "are close with")
+
+# Ensures both agents and the relationship exist, bumps the interaction
+# stats, and appends the shared memory (keeping the last N) in one statement.
+_UPDATE_INTERACTIONS_CYPHER = """
+UNWIND $rows AS row
+MERGE (a:Agent {id: row.a})
+MERGE (b:Agent {id: row.b})
+MERGE (a)-[r:RELATES_TO]->(b)
+ON CREATE SET
+    r.relation_type = 'acquaintance',
+    r.strength = 0.1,
+    r.notes = '',
+    r.last_interaction = row.now,
+    r.interaction_count = 0,
+    r.shared_memories = [],
+    r.canonical_a = row.a,
+    r.canonical_b = row.b
+WITH row, r, r.strength + 0.05 * (1.0 - r.strength) AS grown
+WITH row, r, CASE WHEN grown > 1.0 THEN 1.0 ELSE grown END AS new_s
+SET r.interaction_count = r.interaction_count + 1,
+    r.last_interaction = row.now,
+    r.strength = new_s,
+    r.relation_type = CASE
+        WHEN new_s >= 0.7 THEN 'close_friend'
+        WHEN new_s >= 0.4 THEN 'friend'
+        WHEN new_s >= 0.2 THEN 'acquaintance'
+        ELSE r.relation_type
+    END,
+    r.shared_memories = CASE
+        WHEN row.context = '' THEN r.shared_memories
+        ELSE (r.shared_memories + [row.context])[-$max_memories..]
+    END
+"""
+
 
-@dataclass
+@dataclass(slots=True)
 class Relationship:
     """Mirror of the Relationship dataclass from social_graph.py."""
     agent_a: str
@@ -41,6 +81,12 @@ class Neo4jSocialGraph:
 
     Provides the same public API as the JSON-backed SocialGraph so it
     can be used as a drop-in replacement.
+
+    Each pair of agents has exactly one RELATES_TO edge, always directed
+    from the lexicographically smaller id (canonical_a) to the larger one
+    (canonical_b). Lookups for a known pair match that direction; queries
+    that start from a single agent stay undirected because the agent may
+    sit on either end.
     """
 
     MAX_SHARED_MEMORIES = 10
@@ -57,23 +103,62 @@ class Neo4jSocialGraph:
         self._password = password or settings.neo4j_password
         self._database = database or settings.neo4j_database
 
+        # One pooled driver is shared by every call; sessions are acquired
+        # and released per query by execute_query.
         self._driver = GraphDatabase.driver(
-            self._uri, auth=(self._user, self._password)
+            self._uri,
+            auth=(self._user, self._password),
+            max_connection_pool_size=settings.neo4j_pool_size,
+            connection_acquisition_timeout=settings.neo4j_acquisition_timeout_seconds,
+            connection_timeout=settings.neo4j_connection_timeout_seconds,
+            max_transaction_retry_time=settings.neo4j_max_retry_time_seconds,
         )
 
+        # Flipped off the first time a GDS procedure call fails
+        self._gds_available = True
+
         # Verify connectivity and set up schema
         self._driver.verify_connectivity()
         self._setup_schema()
         logger.info("Neo4j social graph connected at %s", self._uri)
 
+    def _run_read(self, cypher: str, **params):
+        """Run a read query in a managed, retried transaction."""
+        records, _, _ = self._driver.execute_query(
+            cypher,
+            params,
+            database_=self._database,
+            routing_=RoutingControl.READ,
+        )
+        return records
+
+    def _run_write(self, cypher: str, **params):
+        """Run a write query in a managed, retried transaction."""
+        records, _, _ = self._driver.execute_query(
+            cypher,
+            params,
+            database_=self._database,
+            routing_=RoutingControl.WRITE,
+        )
+        return records
+
     def _setup_schema(self) -> None:
         """Create constraints and indexes for the Agent nodes."""
-        with self._driver.session(database=self._database) as session:
-            # Unique constraint on Agent.id
-            session.run(
-                "CREATE CONSTRAINT agent_id_unique IF NOT EXISTS "
-                "FOR (a:Agent) REQUIRE a.id IS UNIQUE"
-            )
+        # Unique constraint on Agent.id
+        self._run_write(
+            "CREATE CONSTRAINT agent_id_unique IF NOT EXISTS "
+            "FOR (a:Agent) REQUIRE a.id IS UNIQUE"
+        )
+        # Range index so strong-tie filters seek instead of scanning every edge
+        self._run_write(
+            "CREATE INDEX rel_strength_idx IF NOT EXISTS "
+            "FOR ()-[r:RELATES_TO]-() ON (r.strength)"
+        )
+        # Relationship type lookup (a no-op if the default one already exists)
+        self._run_write(
+            "CREATE LOOKUP INDEX rel_type_lookup IF NOT EXISTS "
+            "FOR ()-[r]-() ON EACH type(r)"
+        )
 
     # ------------------------------------------------------------------
     # Core CRUD
@@ -91,153 +176,121 @@ class Neo4jSocialGraph:
         strength = min(1.0, max(0.0, strength))
         canonical_a, canonical_b = min(a, b), max(a, b)
 
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MERGE (a:Agent {id: $a})
-                MERGE (b:Agent {id: $b})
-                MERGE (a)-[r:RELATES_TO]-(b)
-                SET r.relation_type = $relation_type,
-                    r.strength = $strength,
-                    r.notes = CASE WHEN $notes <> '' THEN $notes ELSE coalesce(r.notes, '') END,
-                    r.last_interaction = coalesce(r.last_interaction, $now),
-                    r.interaction_count = coalesce(r.interaction_count, 0),
-                    r.shared_memories = coalesce(r.shared_memories, []),
-                    r.canonical_a = $canonical_a,
-                    r.canonical_b = $canonical_b
-                RETURN r
-                """,
-                a=canonical_a,
-                b=canonical_b,
-                relation_type=relation_type,
-                strength=strength,
-                notes=notes,
-                now=time.time(),
-                canonical_a=canonical_a,
-                canonical_b=canonical_b,
-            )
-            record = result.single()
-            r = record["r"] if record else {}
-            return Relationship(
-                agent_a=canonical_a,
-                agent_b=canonical_b,
-                relation_type=r.get("relation_type", relation_type),
-                strength=r.get("strength", strength),
-                notes=r.get("notes", notes),
-                last_interaction=r.get("last_interaction", 0.0),
-                interaction_count=r.get("interaction_count", 0),
-                shared_memories=list(r.get("shared_memories", [])),
-            )
+        records = self._run_write(
+            """
+            MERGE (a:Agent {id: $a})
+            MERGE (b:Agent {id: $b})
+            MERGE (a)-[r:RELATES_TO]->(b)
+            SET r.relation_type = $relation_type,
+                r.strength = $strength,
+                r.notes = CASE WHEN $notes <> '' THEN $notes ELSE coalesce(r.notes, '') END,
+                r.last_interaction = coalesce(r.last_interaction, $now),
+                r.interaction_count = coalesce(r.interaction_count, 0),
+                r.shared_memories = coalesce(r.shared_memories, []),
+                r.canonical_a = $canonical_a,
+                r.canonical_b = $canonical_b
+            RETURN r
+            """,
+            a=canonical_a,
+            b=canonical_b,
+            relation_type=relation_type,
+            strength=strength,
+            notes=notes,
+            now=time.time(),
+            canonical_a=canonical_a,
+            canonical_b=canonical_b,
+        )
+        r = records[0]["r"] if records else {}
+        return Relationship(
+            agent_a=canonical_a,
+            agent_b=canonical_b,
+            relation_type=r.get("relation_type", relation_type),
+            strength=r.get("strength", strength),
+            notes=r.get("notes", notes),
+            last_interaction=r.get("last_interaction", 0.0),
+            interaction_count=r.get("interaction_count", 0),
+            shared_memories=list(r.get("shared_memories", [])),
+        )
 
     def update_interaction(self, a: str, b: str, context: str = "") -> None:
         """Record an interaction between two agents."""
-        canonical_a, canonical_b = min(a, b), max(a, b)
-
-        with self._driver.session(database=self._database) as session:
-            # Ensure both agents and relationship exist
-            session.run(
-                """
-                MERGE (a:Agent {id: $a})
-                MERGE (b:Agent {id: $b})
-                MERGE (a)-[r:RELATES_TO]-(b)
-                ON CREATE SET
-                    r.relation_type = 'acquaintance',
-                    r.strength = 0.1,
-                    r.notes = '',
-                    r.last_interaction = $now,
-                    r.interaction_count = 0,
-                    r.shared_memories = [],
-                    r.canonical_a = $canonical_a,
-                    r.canonical_b = $canonical_b
-                SET r.interaction_count = r.interaction_count + 1,
-                    r.last_interaction = $now,
-                    r.strength = CASE
-                        WHEN r.strength + 0.05 * (1.0 - r.strength) > 1.0 THEN 1.0
-                        ELSE r.strength + 0.05 * (1.0 - r.strength)
-                    END,
-                    r.relation_type = CASE
-                        WHEN r.strength >= 0.7 THEN 'close_friend'
-                        WHEN r.strength >= 0.4 THEN 'friend'
-                        WHEN r.strength >= 0.2 THEN 'acquaintance'
-                        ELSE r.relation_type
-                    END
-                """,
-                a=canonical_a,
-                b=canonical_b,
-                now=time.time(),
-                canonical_a=canonical_a,
-                canonical_b=canonical_b,
-            )
+        self.update_interactions([{"a": a, "b": b, "context": context}])
+        logger.debug("Updated interaction %s <-> %s", a, b)
 
-            # Append shared memory (keep last N)
-            if context:
-                session.run(
-                    """
-                    MATCH (a:Agent {id: $a})-[r:RELATES_TO]-(b:Agent {id: $b})
-                    SET r.shared_memories = r.shared_memories + [$context]
-                    WITH r
-                    WHERE size(r.shared_memories) > $max_memories
-                    SET r.shared_memories = r.shared_memories[-$max_memories..]
-                    """,
-                    a=canonical_a,
-                    b=canonical_b,
-                    context=context[:200],
-                    max_memories=self.MAX_SHARED_MEMORIES,
-                )
+    def update_interactions(self, interactions: list[dict]) -> None:
+        """Record many interactions in one round-trip.
 
-        logger.debug("Updated interaction %s <-> %s", a, b)
+        Each item is a dict with keys ``a``, ``b`` and optional ``context``.
+        All rows are applied by a single UNWIND query in one write
+        transaction.
+        """
+        now = time.time()
+        rows = [
+            {
+                "a": min(item["a"], item["b"]),
+                "b": max(item["a"], item["b"]),
+                "context": item.get("context", "")[:200],
+                "now": now,
+            }
+            for item in interactions
+        ]
+        if not rows:
+            return
+
+        self._run_write(
+            _UPDATE_INTERACTIONS_CYPHER,
+            rows=rows,
+            max_memories=self.MAX_SHARED_MEMORIES,
+        )
 
     def get_relationships(self, agent_id: str) -> list[Relationship]:
         """Get all relationships for an agent."""
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MATCH (a:Agent {id: $agent_id})-[r:RELATES_TO]-(b:Agent)
-                RETURN r, b.id AS other_id
-                """,
-                agent_id=agent_id,
-            )
-            rels = []
-            for record in result:
-                r = record["r"]
-                rels.append(Relationship(
-                    agent_a=r.get("canonical_a", agent_id),
-                    agent_b=r.get("canonical_b", record["other_id"]),
-                    relation_type=r.get("relation_type", "acquaintance"),
-                    strength=r.get("strength", 0.1),
-                    notes=r.get("notes", ""),
-                    last_interaction=r.get("last_interaction", 0.0),
-                    interaction_count=r.get("interaction_count", 0),
-                    shared_memories=list(r.get("shared_memories", [])),
-                ))
-            return rels
-
-    def get_relationship(self, a: str, b: str) -> Optional[Relationship]:
-        """Get the relationship between two specific agents."""
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MATCH (a:Agent {id: $a})-[r:RELATES_TO]-(b:Agent {id: $b})
-                RETURN r
-                """,
-                a=a,
-                b=b,
-            )
-            record = result.single()
-            if not record:
-                return None
+        records = self._run_read(
+            """
+            MATCH (a:Agent {id: $agent_id})-[r:RELATES_TO]-(b:Agent)
+            RETURN r, b.id AS other_id
+            """,
+            agent_id=agent_id,
+        )
+        rels = []
+        for record in records:
             r = record["r"]
-            canonical_a, canonical_b = min(a, b), max(a, b)
-            return Relationship(
-                agent_a=canonical_a,
-                agent_b=canonical_b,
+            rels.append(Relationship(
+                agent_a=r.get("canonical_a", agent_id),
+                agent_b=r.get("canonical_b", record["other_id"]),
                 relation_type=r.get("relation_type", "acquaintance"),
                 strength=r.get("strength", 0.1),
                 notes=r.get("notes", ""),
                 last_interaction=r.get("last_interaction", 0.0),
                 interaction_count=r.get("interaction_count", 0),
                 shared_memories=list(r.get("shared_memories", [])),
-            )
+            ))
+        return rels
+
+    def get_relationship(self, a: str, b: str) -> Optional[Relationship]:
+        """Get the relationship between two specific agents."""
+        canonical_a, canonical_b = min(a, b), max(a, b)
+        records = self._run_read(
+            """
+            MATCH (a:Agent {id: $a})-[r:RELATES_TO]->(b:Agent {id: $b})
+            RETURN r
+            """,
+            a=canonical_a,
+            b=canonical_b,
+        )
+        if not records:
+            return None
+        r = records[0]["r"]
+        return Relationship(
+            agent_a=canonical_a,
+            agent_b=canonical_b,
+            relation_type=r.get("relation_type", "acquaintance"),
+            strength=r.get("strength", 0.1),
+            notes=r.get("notes", ""),
+            last_interaction=r.get("last_interaction", 0.0),
+            interaction_count=r.get("interaction_count", 0),
+            shared_memories=list(r.get("shared_memories", [])),
+        )
 
     # ------------------------------------------------------------------
     # Neo4j-exclusive: multi-hop queries
@@ -248,88 +301,156 @@ class Neo4jSocialGraph:
 
         This is the kind of query that the flat-dict approach cannot do.
         """
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MATCH (a:Agent {id: $agent_id})-[:RELATES_TO]-(:Agent)-[:RELATES_TO]-(fof:Agent)
-                WHERE fof.id <> $agent_id
-                  AND NOT (a)-[:RELATES_TO]-(fof)
-                RETURN DISTINCT fof.id AS fof_id
-                """,
-                agent_id=agent_id,
-            )
-            return [record["fof_id"] for record in result]
+        records = self._run_read(
+            """
+            MATCH (a:Agent {id: $agent_id})-[:RELATES_TO]-(:Agent)-[:RELATES_TO]-(fof:Agent)
+            WHERE fof.id <> $agent_id
+              AND NOT (a)-[:RELATES_TO]-(fof)
+            RETURN DISTINCT fof.id AS fof_id
+            """,
+            agent_id=agent_id,
+        )
+        return [record["fof_id"] for record in records]
 
-    def get_gossip_path(self, from_agent: str, to_agent: str) -> list[str]:
+    def get_gossip_path(
+        self, from_agent: str, to_agent: str, max_hops: int = 6
+    ) -> list[str]:
         """Find the shortest social path between two agents.
 
-        Models how information (gossip, rumors) might propagate.
+        Models how information (gossip, rumors) might propagate. The search
+        is bounded to ``max_hops`` relationships (six degrees by default) so
+        it cannot fan out across a dense graph; returns [] if no path is
+        found within that depth.
         """
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MATCH path = shortestPath(
-                    (a:Agent {id: $from})-[:RELATES_TO*]-(b:Agent {id: $to})
-                )
-                RETURN [n IN nodes(path) | n.id] AS path
-                """,
-                **{"from": from_agent, "to": to_agent},
+        # Variable-length bounds cannot be query parameters, so the
+        # validated integer is inlined.
+        max_hops = max(1, int(max_hops))
+        records = self._run_read(
+            f"""
+            MATCH path = shortestPath(
+                (a:Agent {{id: $from}})-[:RELATES_TO*..{max_hops}]-(b:Agent {{id: $to}})
             )
-            record = result.single()
-            return record["path"] if record else []
+            RETURN [n IN nodes(path) | n.id] AS path
+            """,
+            **{"from": from_agent, "to": to_agent},
+        )
+        return records[0]["path"] if records else []
 
     def get_social_clusters(self) -> list[list[str]]:
-        """Identify tightly-connected groups of agents."""
-        with self._driver.session(database=self._database) as session:
-            result = session.run(
-                """
-                MATCH (a:Agent)-[r:RELATES_TO]-(b:Agent)
-                WHERE r.strength >= 0.4
-                RETURN a.id AS agent, collect(DISTINCT b.id) AS friends
+        """Identify tightly-connected groups of agents.
+
+        Uses Graph Data Science weakly connected components over strong
+        ties when the plugin is installed, otherwise clusters in Python.
+        """
+        if self._gds_available:
+            try:
+                return self._get_social_clusters_gds()
+            except ClientError as e:
+                logger.info(
+                    "GDS unavailable (%s); clustering in Python instead", e.code
+                )
+                self._gds_available = False
+        return self._get_social_clusters_local()
+
+    def _get_social_clusters_gds(self) -> list[list[str]]:
+        """Run WCC in-database so only (component, members) rows come back."""
+        graph_name = f"social_{uuid.uuid4().hex}"
+        self._run_write(
+            """
+            CALL gds.graph.project.cypher(
+                $graph_name,
+                'MATCH (a:Agent) RETURN id(a) AS id',
+                'MATCH (a:Agent)-[r:RELATES_TO]->(b:Agent) WHERE r.strength >= 0.4
+                 RETURN id(a) AS source, id(b) AS target'
+            )
+            YIELD graphName
+            RETURN graphName
+            """,
+            graph_name=graph_name,
+        )
+        # The graph catalog is per-server, so stream on the same (writer)
+        # member that holds the projection.
+        try:
+            records = self._run_write(
                 """
+                CALL gds.wcc.stream($graph_name)
+                YIELD nodeId, componentId
+                WITH componentId, collect(gds.util.asNode(nodeId).id) AS members
+                WHERE size(members) > 1
+                RETURN members
+                """,
+                graph_name=graph_name,
             )
-            # Simple clustering: group agents who share friends
-            clusters: list[set[str]] = []
-            for record in result:
-                agent = record["agent"]
-                friends = set(record["friends"])
-                friends.add(agent)
-                # Merge with existing clusters that overlap
-                merged = False
-                for cluster in clusters:
-                    if cluster & friends:
-                        cluster |= friends
-                        merged = True
-                        break
-                if not merged:
-                    clusters.append(friends)
-            return [sorted(c) for c in clusters]
+        finally:
+            self._run_write(
+                "CALL gds.graph.drop($graph_name, false) YIELD graphName "
+                "RETURN graphName",
+                graph_name=graph_name,
+            )
+        return [sorted(record["members"]) for record in records]
+
+    def _get_social_clusters_local(self) -> list[list[str]]:
+        """Fallback clustering: fetch strong ties and merge overlapping groups."""
+        records = self._run_read(
+            """
+            MATCH (a:Agent)-[r:RELATES_TO]-(b:Agent)
+            USING INDEX r:RELATES_TO(strength)
+            WHERE r.strength >= 0.4
+            RETURN a.id AS agent, collect(DISTINCT b.id) AS friends
+            """
+        )
+        # Simple clustering: group agents who share friends
+        clusters: list[set[str]] = []
+        for record in records:
+            agent = record["agent"]
+            friends = set(record["friends"])
+            friends.add(agent)
+            # Merge with existing clusters that overlap
+            merged = False
+            for cluster in clusters:
+                if cluster & friends:
+                    cluster |= friends
+                    merged = True
+                    break
+            if not merged:
+                clusters.append(friends)
+        return [sorted(c) for c in clusters]
 
     # ------------------------------------------------------------------
     # Prompt formatting
     # ------------------------------------------------------------------
 
     def format_for_prompt(self, agent_id: str) -> str:
-        """Format relationships as prompt context for an agent."""
-        rels = self.get_relationships(agent_id)
-        if not rels:
+        """Format relationships as prompt context for an agent.
+
+        Projects only the fields the prompt needs (and just the last shared
+        memory) instead of materializing full Relationship objects.
+        """
+        records = self._run_read(
+            """
+            MATCH (a:Agent {id: $agent_id})-[r:RELATES_TO]-(b:Agent)
+            RETURN b.id AS other,
+                   coalesce(r.relation_type, 'acquaintance') AS relation_type,
+                   coalesce(r.strength, 0.1) AS strength,
+                   r.notes AS notes,
+                   CASE WHEN size(r.shared_memories) > 0
+                        THEN r.shared_memories[-1] ELSE null END AS last_memory
+            """,
+            agent_id=agent_id,
+        )
+        if not records:
             return ""
 
-        lines = ["\n[RELATIONSHIPS] People you know:"]
-        for rel in rels:
-            other = rel.agent_b if rel.agent_a == agent_id else rel.agent_a
-            strength_desc = "barely know" if rel.strength < 0.2 else \
-                           "somewhat know" if rel.strength < 0.4 else \
-                           "know well" if rel.strength < 0.7 else \
-                           "are close with"
-            line = f"  - {other} ({rel.relation_type}): You {strength_desc} them."
-            if rel.notes:
-                line += f" {rel.notes}"
-            if rel.shared_memories:
-                line += f" Last interaction: {rel.shared_memories[-1]}"
-            lines.append(line)
-
-        return "\n".join(lines)
+        return "\n".join([
+            "\n[RELATIONSHIPS] People you know:",
+            *(
+                f"  - {other} ({relation_type}): You "
+                f"{_STRENGTH_DESCS[bisect.bisect_right(_STRENGTH_THRESHOLDS, strength)]} them."
+                f"{f' {notes}' if notes else ''}"
+                f"{f' Last interaction: {last_memory}' if last_memory else ''}"
+                for other, relation_type, strength, notes, last_memory in records
+            ),
+        ])
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -339,6 +460,10 @@ class Neo4jSocialGraph:
         """No-op — Neo4j is always persisted. Kept for API compatibility."""
         pass
 
+    async def persist_async(self) -> None:
+        """No-op — Neo4j is always persisted. Kept for API compatibility."""
+        pass
+
     def close(self) -> None:
         """Close the Neo4j driver connection."""
         self._driver.close()
@@ -7,9 +7,11 @@ tool invocation, and agent lifecycle event.
 
 from __future__ import annotations
 
+import asyncio
 import functools
 import logging
-import time
+import random
+from datetime import datetime, timezone
 from typing import Any, Callable, Optional
 
 from core.config import settings
@@ -56,11 +58,48 @@ def flush_langfuse() -> None:
             logger.warning("Langfuse flush error: %s", e)
 
 
+def _emit_trace(
+    client: Any,
+    name: str,
+    agent_id: Any,
+    args: tuple,
+    kwargs: dict,
+    started: datetime,
+    ended: datetime,
+    result: Any = None,
+    error: Optional[BaseException] = None,
+) -> None:
+    """Create the trace and its completed span (runs off the call path)."""
+    try:
+        trace = client.trace(
+            name=name,
+            metadata={"agent_id": agent_id},
+        )
+        latency_ms = round((ended - started).total_seconds() * 1000)
+        span_kwargs: dict[str, Any] = {
+            "name": f"{name}_execution",
+            "start_time": started,
+            "end_time": ended,
+            "input": {"agent_id": agent_id, "args": repr(args)[:500], "kwargs": repr(kwargs)[:500]},
+            "metadata": {"latency_ms": latency_ms},
+        }
+        if error is not None:
+            span_kwargs["output"] = {"error": str(error)}
+            span_kwargs["level"] = "ERROR"
+        else:
+            span_kwargs["output"] = {"result": str(result)[:2000]}
+        trace.span(**span_kwargs)
+    except Exception as e:
+        logger.warning("Langfuse trace emit failed for %s: %s", name, e)
+
+
 def trace_agent_action(name: str) -> Callable:
     """Async decorator that wraps a function with a Langfuse trace.
 
     Captures agent_id (first positional arg after self), prompt input,
-    output, latency, and errors.
+    output, latency, and errors. Only a ``langfuse_sample_rate`` fraction of
+    calls is traced, and the trace is built after the call returns via
+    ``loop.call_soon`` so no Langfuse work sits on the wrapped call's path.
 
     Usage:
         @trace_agent_action("chat")
@@ -74,36 +113,28 @@ def trace_agent_action(name: str) -> Callable:
             client = _langfuse_client
             if client is None:
                 return await func(*args, **kwargs)
+            rate = settings.langfuse_sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                return await func(*args, **kwargs)
 
             # Extract agent_id from first arg after self
             agent_id = args[1] if len(args) > 1 else kwargs.get("agent_id", "unknown")
+            loop = asyncio.get_running_loop()
 
-            trace = client.trace(
-                name=name,
-                metadata={"agent_id": agent_id},
-            )
-            span = trace.span(
-                name=f"{name}_execution",
-                input={"agent_id": agent_id, "args": str(args[2:]), "kwargs": {k: str(v) for k, v in kwargs.items()}},
-            )
-
-            start = time.time()
+            started = datetime.now(timezone.utc)
             try:
                 result = await func(*args, **kwargs)
-                latency = time.time() - start
-                span.end(
-                    output={"result": str(result)[:2000]},
-                    metadata={"latency_ms": round(latency * 1000)},
-                )
-                return result
             except Exception as e:
-                latency = time.time() - start
-                span.end(
-                    output={"error": str(e)},
-                    level="ERROR",
-                    metadata={"latency_ms": round(latency * 1000)},
+                loop.call_soon(
+                    _emit_trace, client, name, agent_id, args[2:], kwargs,
+                    started, datetime.now(timezone.utc), None, e,
                 )
                 raise
+            loop.call_soon(
+                _emit_trace, client, name, agent_id, args[2:], kwargs,
+                started, datetime.now(timezone.utc), result,
+            )
+            return result
 
         return wrapper
 
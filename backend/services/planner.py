@@ -7,25 +7,97 @@ current plan is exhausted). Plans are informed by recent memories and persona.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from typing import TYPE_CHECKING, Optional
 
 from core.config import settings
+from services._genai_client import get_client
+from services.result_cache import ResultCache, get_default_cache, make_key
 
 if TYPE_CHECKING:
     from services.memory_store import MemoryStore
 
 logger = logging.getLogger(__name__)
 
+# Constrained decoding: Gemini returns a bare JSON array of strings, so
+# responses parse directly without fence stripping.
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
+
+# Generation configs shared by the sync and async call paths
+_PLAN_CONFIG = {
+    "max_output_tokens": 512,
+    "temperature": 0.8,
+    "response_mime_type": "application/json",
+    "response_schema": _STRING_LIST_SCHEMA,
+}
+_DECOMPOSE_CONFIG = {
+    "max_output_tokens": 256,
+    "temperature": 0.7,
+    "response_mime_type": "application/json",
+    "response_schema": _STRING_LIST_SCHEMA,
+}
+
+
+# Prompt templates are built once; optional sections are passed in as
+# preformatted blocks (empty string when absent).
+_PLAN_TEMPLATE = (
+    "You are generating a daily plan for {name}.\n"
+    "Persona: {persona}\n"
+    "Current location: {location}\n"
+    "{prev_block}"
+    "{memory_block}"
+    "{mood_block}"
+    "{reflection_block}"
+    "{relationship_block}\n"
+    "Generate a realistic daily plan with {steps_min} to {steps_max} steps. "
+    "Each step should be a concrete action the character would take during their day. "
+    "Consider the character's relationships — they might seek out friends, avoid rivals, or plan activities with people they know. "
+    "Return ONLY a JSON array of strings, no other text.\n"
+    'Example: ["Wake up and make breakfast", "Walk to the town square", "Chat with neighbors"]'
+)
+
+_DECOMPOSE_TEMPLATE = (
+    "Break down this plan step for {agent_name} into smaller sub-steps "
+    "of about {granularity} minutes each.\n"
+    "Step: {description}\n"
+    "Return ONLY a JSON array of strings."
+)
+
+_FALLBACK_PLAN = [
+    "Observe surroundings and take stock of the day",
+    "Walk to a nearby area and explore",
+    "Talk to someone nearby",
+    "Interact with an interesting object",
+    "Reflect on the day's events",
+]
+
 
 class Planner:
     """Generates and decomposes daily plans for agents."""
 
-    def __init__(self, memory_store: Optional[MemoryStore] = None):
+    def __init__(
+        self,
+        memory_store: Optional[MemoryStore] = None,
+        cache: Optional[ResultCache] = None,
+    ):
         self.memory_store = memory_store
+        # Identical prompts (same persona, memories, mood, ...) reuse the
+        # previous result instead of calling Gemini again.
+        self.cache = cache if cache is not None else get_default_cache()
 
-    def generate_plan(
+    def _cache_get(self, key: str) -> Optional[list[str]]:
+        if self.cache is None:
+            return None
+        hit = self.cache.get(key)
+        return list(hit) if hit is not None else None
+
+    def _cache_set(self, key: str, value: list[str]) -> None:
+        if self.cache is not None:
+            self.cache.set(key, list(value))
+
+    def _build_plan_prompt(
         self,
         agent_id: str,
         name: str,
@@ -35,104 +107,145 @@ class Planner:
         reflection_context: str = "",
         mood: str = "neutral",
         relationship_context: str = "",
-    ) -> list[str]:
-        """Generate a daily plan for an agent.
-
-        Returns a list of 5-8 high-level steps.
-        """
+    ) -> str:
+        """Assemble the daily-plan prompt, including recent memory context."""
         # Gather recent memory context
-        memory_context = ""
+        memory_block = ""
         if self.memory_store is not None:
             memories = self.memory_store.retrieve(
                 agent_id, f"{name}'s recent activities and plans", top_k=10
             )
             if memories:
-                memory_lines = [f"  - {text}" for text, _score in memories]
-                memory_context = "\nRecent memories:\n" + "\n".join(memory_lines)
-
-        mood_context = f"\nCurrent mood: {mood}. Let this mood influence the plan.\n" if mood != "neutral" else ""
-        reflection_block = f"\nKey reflections:\n{reflection_context}\n" if reflection_context else ""
-        relationship_block = f"\n{relationship_context}\n" if relationship_context else ""
-
-        prompt = (
-            f"You are generating a daily plan for {name}.\n"
-            f"Persona: {persona}\n"
-            f"Current location: {location}\n"
-            f"{f'Previous day summary: {previous_summary}' if previous_summary else ''}"
-            f"{memory_context}"
-            f"{mood_context}"
-            f"{reflection_block}"
-            f"{relationship_block}\n"
-            f"Generate a realistic daily plan with {settings.plan_steps_min} to {settings.plan_steps_max} steps. "
-            "Each step should be a concrete action the character would take during their day. "
-            "Consider the character's relationships — they might seek out friends, avoid rivals, or plan activities with people they know. "
-            "Return ONLY a JSON array of strings, no other text.\n"
-            'Example: ["Wake up and make breakfast", "Walk to the town square", "Chat with neighbors"]'
-        )
+                memory_block = "\nRecent memories:\n" + "\n".join(
+                    [f"  - {text}" for text, _score in memories]
+                )
+
+        return _PLAN_TEMPLATE.format_map({
+            "name": name,
+            "persona": persona,
+            "location": location,
+            "prev_block": f"Previous day summary: {previous_summary}" if previous_summary else "",
+            "memory_block": memory_block,
+            "mood_block": f"\nCurrent mood: {mood}. Let this mood influence the plan.\n" if mood != "neutral" else "",
+            "reflection_block": f"\nKey reflections:\n{reflection_context}\n" if reflection_context else "",
+            "relationship_block": f"\n{relationship_context}\n" if relationship_context else "",
+            "steps_min": settings.plan_steps_min,
+            "steps_max": settings.plan_steps_max,
+        })
+
+    @staticmethod
+    def _parse_plan(text: str) -> Optional[list[str]]:
+        steps = json.loads(text)
+        if isinstance(steps, list) and all(isinstance(s, str) for s in steps):
+            return steps[: settings.plan_steps_max]
+        return None
 
+    def generate_plan(
+        self,
+        agent_id: str,
+        name: str,
+        persona: str,
+        previous_summary: str = "",
+        location: str = "",
+        reflection_context: str = "",
+        mood: str = "neutral",
+        relationship_context: str = "",
+    ) -> list[str]:
+        """Generate a daily plan for an agent.
+
+        Returns a list of 5-8 high-level steps.
+        """
+        prompt = self._build_plan_prompt(
+            agent_id, name, persona, previous_summary, location,
+            reflection_context, mood, relationship_context,
+        )
+        key = make_key({"kind": "plan", "agent_id": agent_id, "prompt": prompt})
+        if (hit := self._cache_get(key)) is not None:
+            return hit
         try:
-            from google import genai
+            response = get_client().models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt,
+                config=_PLAN_CONFIG,
+            )
+            steps = self._parse_plan(response.text)
+            if steps is not None:
+                self._cache_set(key, steps)
+                return steps
+        except Exception as e:
+            logger.warning("Plan generation failed for %s: %s", agent_id, e)
+
+        return list(_FALLBACK_PLAN)
 
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+    async def generate_plan_async(
+        self,
+        agent_id: str,
+        name: str,
+        persona: str,
+        previous_summary: str = "",
+        location: str = "",
+        reflection_context: str = "",
+        mood: str = "neutral",
+        relationship_context: str = "",
+    ) -> list[str]:
+        """Async variant of ``generate_plan`` using the client's aio API."""
+        prompt = await asyncio.to_thread(
+            self._build_plan_prompt,
+            agent_id, name, persona, previous_summary, location,
+            reflection_context, mood, relationship_context,
+        )
+        key = make_key({"kind": "plan", "agent_id": agent_id, "prompt": prompt})
+        if (hit := self._cache_get(key)) is not None:
+            return hit
+        try:
+            response = await get_client().aio.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=prompt,
-                config={
-                    "max_output_tokens": 512,
-                    "temperature": 0.8,
-                },
+                config=_PLAN_CONFIG,
             )
-            text = response.text.strip()
-            # Strip markdown code fences if present
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-                if text.endswith("```"):
-                    text = text[:-3].strip()
-
-            steps = json.loads(text)
-            if isinstance(steps, list) and all(isinstance(s, str) for s in steps):
-                return steps[: settings.plan_steps_max]
+            steps = self._parse_plan(response.text)
+            if steps is not None:
+                self._cache_set(key, steps)
+                return steps
         except Exception as e:
             logger.warning("Plan generation failed for %s: %s", agent_id, e)
 
-        # Fallback plan
-        return [
-            "Observe surroundings and take stock of the day",
-            "Walk to a nearby area and explore",
-            "Talk to someone nearby",
-            "Interact with an interesting object",
-            "Reflect on the day's events",
-        ]
+        return list(_FALLBACK_PLAN)
 
-    def decompose_step(self, description: str, agent_name: str) -> list[str]:
-        """Decompose a plan step into 15-minute sub-steps."""
-        prompt = (
-            f"Break down this plan step for {agent_name} into smaller sub-steps "
-            f"of about {settings.plan_decompose_granularity_minutes} minutes each.\n"
-            f"Step: {description}\n"
-            "Return ONLY a JSON array of strings."
+    async def generate_plans_bulk(self, requests: list[dict]) -> dict[str, list[str]]:
+        """Generate plans for many agents concurrently.
+
+        Each request holds the ``generate_plan`` keyword arguments, including
+        ``agent_id``. Returns a mapping of agent_id to plan steps.
+        """
+        plans = await asyncio.gather(
+            *(self.generate_plan_async(**req) for req in requests)
         )
+        return {req["agent_id"]: steps for req, steps in zip(requests, plans)}
 
-        try:
-            from google import genai
+    @staticmethod
+    def _build_decompose_prompt(description: str, agent_name: str) -> str:
+        return _DECOMPOSE_TEMPLATE.format_map({
+            "agent_name": agent_name,
+            "granularity": settings.plan_decompose_granularity_minutes,
+            "description": description,
+        })
 
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+    def decompose_step(self, description: str, agent_name: str) -> list[str]:
+        """Decompose a plan step into 15-minute sub-steps."""
+        prompt = self._build_decompose_prompt(description, agent_name)
+        key = make_key({"kind": "decompose", "prompt": prompt})
+        if (hit := self._cache_get(key)) is not None:
+            return hit
+        try:
+            response = get_client().models.generate_content(
                 model="gemini-2.5-flash",
                 contents=prompt,
-                config={
-                    "max_output_tokens": 256,
-                    "temperature": 0.7,
-                },
+                config=_DECOMPOSE_CONFIG,
             )
-            text = response.text.strip()
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-                if text.endswith("```"):
-                    text = text[:-3].strip()
-
-            sub_steps = json.loads(text)
+            sub_steps = json.loads(response.text)
             if isinstance(sub_steps, list):
+                self._cache_set(key, sub_steps)
                 return sub_steps
         except Exception as e:
             logger.warning("Step decomposition failed: %s", e)
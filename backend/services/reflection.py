@@ -8,91 +8,189 @@ threshold (default 150), the engine:
 3. Uses those questions to retrieve additional relevant memories
 4. Generates 3 insight reflections
 5. Stores reflections as memories (category="reflection", importance=8)
+
+With ``reflection_fused_prompt`` enabled (the default), steps 2-4 collapse
+into a single Gemini call that returns both the questions and the insights,
+skipping the question-driven retrieval.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+import numpy as np
 
 from core.config import settings
+from services._genai_client import get_client
+from services.result_cache import ResultCache, get_default_cache, make_key
 
 if TYPE_CHECKING:
     from services.memory_store import MemoryStore
 
 logger = logging.getLogger(__name__)
 
+# Constrained decoding: Gemini returns bare JSON matching these shapes
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
+_QUESTIONS_AND_INSIGHTS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "questions": _STRING_LIST_SCHEMA,
+        "insights": _STRING_LIST_SCHEMA,
+    },
+    "required": ["questions", "insights"],
+}
+
+
+def _json_config(schema: dict, max_output_tokens: int) -> dict:
+    """Generation config for a schema-constrained JSON call (sync or async)."""
+    return {
+        "max_output_tokens": max_output_tokens,
+        "temperature": 0.7,
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+    }
+
+
+# Prompt templates, built once and filled with format_map
+_QUESTIONS_TEMPLATE = (
+    "Given the following recent memories of {agent_name}:\n"
+    "{statements}\n\n"
+    "What are 3 most salient high-level questions we can answer about "
+    "{agent_name}'s life and experiences based on these statements?\n"
+    "Return ONLY a JSON array of 3 question strings."
+)
+
+_INSIGHTS_TEMPLATE = (
+    "You are {agent_name} reflecting on your experiences.\n"
+    "Questions to consider:\n{questions_block}\n\n"
+    "Relevant memories:\n{context}\n\n"
+    "Based on these memories, generate exactly 3 high-level insight reflections. "
+    "Each reflection should be a profound observation about your life, "
+    "relationships, or situation — not a simple summary of events. "
+    "Write in first person as the character.\n"
+    "Return ONLY a JSON array of 3 reflection strings."
+)
+
+_QUESTIONS_AND_INSIGHTS_TEMPLATE = (
+    "You are {agent_name} reflecting on your experiences.\n"
+    "Your recent memories:\n{statements}\n\n"
+    "First, identify the 3 most salient high-level questions about your "
+    "life and experiences that these memories can answer. Then, based on "
+    "these memories, write exactly 3 high-level insight reflections that "
+    "answer them. Each reflection should be a profound observation about "
+    "your life, relationships, or situation — not a simple summary of "
+    "events. Write in first person as the character.\n"
+    'Return ONLY a JSON object: {{"questions": [3 strings], "insights": [3 strings]}}.'
+)
+
 
 class ReflectionEngine:
     """Generates high-level reflections from accumulated memories."""
 
-    def __init__(self, memory_store: Optional[MemoryStore] = None):
+    def __init__(
+        self,
+        memory_store: Optional[MemoryStore] = None,
+        cache: Optional[ResultCache] = None,
+    ):
         self.memory_store = memory_store
-        self._importance_accumulators: dict[str, float] = {}
+        self.cache = cache if cache is not None else get_default_cache()
+        # Per-agent importance totals live in one array, indexed by slot
+        self._agent_index: dict[str, int] = {}
+        self._acc = np.zeros(16, dtype=np.float32)
+
+    def _slot(self, agent_id: str) -> int:
+        """Return the accumulator slot for an agent, growing the array if needed."""
+        idx = self._agent_index.get(agent_id)
+        if idx is None:
+            idx = len(self._agent_index)
+            self._agent_index[agent_id] = idx
+            if idx >= len(self._acc):
+                grown = np.zeros(len(self._acc) * 2, dtype=np.float32)
+                grown[: len(self._acc)] = self._acc
+                self._acc = grown
+        return idx
 
     def accumulate_importance(self, agent_id: str, importance: int) -> None:
         """Add importance score to the running total for an agent."""
-        current = self._importance_accumulators.get(agent_id, 0.0)
-        self._importance_accumulators[agent_id] = current + importance
+        self._acc[self._slot(agent_id)] += importance
+
+    def accumulate_importance_bulk(
+        self, agent_ids: Iterable[str], importances: Iterable[float]
+    ) -> None:
+        """Add many importance scores at once (agent ids may repeat)."""
+        idxs = np.fromiter((self._slot(a) for a in agent_ids), dtype=np.intp)
+        np.add.at(self._acc, idxs, np.fromiter(importances, dtype=np.float32, count=len(idxs)))
 
     def check_threshold(self, agent_id: str) -> bool:
         """Check if the agent's accumulated importance exceeds the reflection threshold."""
-        return self._importance_accumulators.get(agent_id, 0.0) >= settings.reflection_importance_threshold
+        idx = self._agent_index.get(agent_id)
+        return idx is not None and bool(self._acc[idx] >= settings.reflection_importance_threshold)
+
+    def over_threshold_agents(self) -> list[str]:
+        """Return every agent whose accumulated importance crossed the threshold."""
+        if not self._agent_index:
+            return []
+        ids = list(self._agent_index)
+        hits = np.flatnonzero(
+            self._acc[: len(ids)] >= settings.reflection_importance_threshold
+        )
+        return [ids[i] for i in hits]
 
     def reset_accumulator(self, agent_id: str) -> None:
         """Reset the importance accumulator after reflection."""
-        self._importance_accumulators[agent_id] = 0.0
+        idx = self._agent_index.get(agent_id)
+        if idx is not None:
+            self._acc[idx] = 0.0
 
-    def generate_reflections(self, agent_id: str, agent_name: str) -> list[str]:
-        """Generate high-level reflections for an agent.
+    def _load_recent(self, agent_id: str) -> Optional[tuple[list[str], str]]:
+        """Load the recent memories to reflect on.
 
-        This is a synchronous call (suitable for fire-and-forget via asyncio.ensure_future).
+        Returns (recent_texts, statements_block), or None if there are none.
         """
-        if self.memory_store is None:
-            return []
-
-        # Reset accumulator first to prevent re-triggering
-        self.reset_accumulator(agent_id)
-
-        # Step 1: Retrieve recent memories
         recent = self.memory_store.retrieve_recent(
             agent_id, count=settings.reflection_recent_memory_count
         )
         if not recent:
-            return []
+            return None
 
         recent_texts = [text for text, _meta in recent]
         statements_block = "\n".join(f"  {i+1}. {t}" for i, t in enumerate(recent_texts[:50]))
+        return recent_texts, statements_block
 
-        # Step 2: Ask for salient questions
-        questions = self._generate_questions(agent_name, statements_block)
-        if not questions:
-            return []
-
-        # Step 3: Retrieve memories relevant to each question
-        extra_context: list[str] = []
-        for q in questions:
-            results = self.memory_store.retrieve(agent_id, q, top_k=5)
+    def _build_context_block(
+        self, agent_id: str, questions: list[str], recent_texts: list[str]
+    ) -> str:
+        """Retrieve memories relevant to each question and build the context."""
+        # (dict keeps first-seen order while giving O(1) membership checks)
+        recent_set = frozenset(recent_texts)
+        extra_context: dict[str, None] = {}
+        results_per_q = self.memory_store.retrieve_batch(agent_id, questions, top_k=5)
+        for results in results_per_q:
             for text, _score in results:
-                if text not in extra_context and text not in recent_texts:
-                    extra_context.append(text)
+                if text not in recent_set:
+                    extra_context.setdefault(text, None)
 
-        # Step 4: Generate reflections
-        all_context = recent_texts[:30] + extra_context[:20]
-        context_block = "\n".join(f"  - {t}" for t in all_context)
-        reflections = self._generate_insights(agent_name, questions, context_block)
+        all_context = recent_texts[:30] + list(extra_context)[:20]
+        return "\n".join(f"  - {t}" for t in all_context)
 
-        # Step 5: Store reflections as memories
-        for reflection in reflections:
-            self.memory_store.add_memory(
-                agent_id,
-                reflection,
-                metadata={
-                    "category": "reflection",
-                    "importance": settings.reflection_default_importance,
-                },
-            )
+    def _store_reflections(self, agent_id: str, reflections: list[str]) -> None:
+        """Store reflections as memories (one batched embed + insert)."""
+        self.memory_store.add_memories(
+            agent_id,
+            [
+                {
+                    "text": reflection,
+                    "metadata": {
+                        "category": "reflection",
+                        "importance": settings.reflection_default_importance,
+                    },
+                }
+                for reflection in reflections
+            ],
+        )
 
         logger.info(
             "Stored %d reflections for %s (accumulator was %.1f)",
@@ -100,61 +198,175 @@ class ReflectionEngine:
             agent_id,
             settings.reflection_importance_threshold,
         )
+
+    def generate_reflections(self, agent_id: str, agent_name: str) -> list[str]:
+        """Generate high-level reflections for an agent (blocking)."""
+        if self.memory_store is None:
+            return []
+
+        # Reset accumulator first to prevent re-triggering
+        self.reset_accumulator(agent_id)
+
+        # Step 1: Retrieve recent memories
+        begun = self._load_recent(agent_id)
+        if begun is None:
+            return []
+        recent_texts, statements_block = begun
+
+        if settings.reflection_fused_prompt:
+            # Steps 2-4 in one call: questions and insights from recent memories
+            _questions, reflections = self._split_questions_and_insights(
+                self._call_gemini_json(
+                    self._questions_and_insights_prompt(agent_name, statements_block),
+                    _QUESTIONS_AND_INSIGHTS_SCHEMA,
+                    max_output_tokens=768,
+                )
+            )
+        else:
+            # Step 2: Ask for salient questions
+            questions = self._call_gemini_json_list(
+                self._questions_prompt(agent_name, statements_block), max_items=3
+            )
+            if not questions:
+                return []
+
+            # Steps 3-4: Retrieve question-relevant memories, generate reflections
+            context_block = self._build_context_block(agent_id, questions, recent_texts)
+            reflections = self._call_gemini_json_list(
+                self._insights_prompt(agent_name, questions, context_block), max_items=3
+            )
+
+        # Step 5: Store reflections as memories
+        self._store_reflections(agent_id, reflections)
+        return reflections
+
+    async def generate_reflections_async(self, agent_id: str, agent_name: str) -> list[str]:
+        """Async variant of ``generate_reflections``.
+
+        The Gemini calls go through the async client and the memory-store
+        work runs in a worker thread, so the event loop is never blocked.
+        In the two-phase mode the questions -> insights dependency is kept.
+        """
+        if self.memory_store is None:
+            return []
+        self.reset_accumulator(agent_id)
+
+        begun = await asyncio.to_thread(self._load_recent, agent_id)
+        if begun is None:
+            return []
+        recent_texts, statements_block = begun
+
+        if settings.reflection_fused_prompt:
+            _questions, reflections = self._split_questions_and_insights(
+                await self._call_gemini_json_async(
+                    self._questions_and_insights_prompt(agent_name, statements_block),
+                    _QUESTIONS_AND_INSIGHTS_SCHEMA,
+                    max_output_tokens=768,
+                )
+            )
+        else:
+            questions = await self._call_gemini_json_list_async(
+                self._questions_prompt(agent_name, statements_block), max_items=3
+            )
+            if not questions:
+                return []
+
+            context_block = await asyncio.to_thread(
+                self._build_context_block, agent_id, questions, recent_texts
+            )
+            reflections = await self._call_gemini_json_list_async(
+                self._insights_prompt(agent_name, questions, context_block), max_items=3
+            )
+
+        await asyncio.to_thread(self._store_reflections, agent_id, reflections)
         return reflections
 
-    def _generate_questions(self, agent_name: str, statements: str) -> list[str]:
-        """Ask Gemini for 3 salient high-level questions about recent memories."""
-        prompt = (
-            f"Given the following recent memories of {agent_name}:\n"
-            f"{statements}\n\n"
-            "What are 3 most salient high-level questions we can answer about "
-            f"{agent_name}'s life and experiences based on these statements?\n"
-            "Return ONLY a JSON array of 3 question strings."
+    @staticmethod
+    def _questions_prompt(agent_name: str, statements: str) -> str:
+        """Prompt asking for 3 salient high-level questions about recent memories."""
+        return _QUESTIONS_TEMPLATE.format_map(
+            {"agent_name": agent_name, "statements": statements}
         )
-        return self._call_gemini_json_list(prompt, max_items=3)
-
-    def _generate_insights(
-        self, agent_name: str, questions: list[str], context: str
-    ) -> list[str]:
-        """Generate 3 insight reflections from questions and context."""
-        questions_block = "\n".join(f"  {i+1}. {q}" for i, q in enumerate(questions))
-        prompt = (
-            f"You are {agent_name} reflecting on your experiences.\n"
-            f"Questions to consider:\n{questions_block}\n\n"
-            f"Relevant memories:\n{context}\n\n"
-            "Based on these memories, generate exactly 3 high-level insight reflections. "
-            "Each reflection should be a profound observation about your life, "
-            "relationships, or situation — not a simple summary of events. "
-            "Write in first person as the character.\n"
-            "Return ONLY a JSON array of 3 reflection strings."
+
+    @staticmethod
+    def _insights_prompt(agent_name: str, questions: list[str], context: str) -> str:
+        """Prompt asking for 3 insight reflections from questions and context."""
+        return _INSIGHTS_TEMPLATE.format_map({
+            "agent_name": agent_name,
+            "questions_block": "\n".join(f"  {i+1}. {q}" for i, q in enumerate(questions)),
+            "context": context,
+        })
+
+    @staticmethod
+    def _questions_and_insights_prompt(agent_name: str, statements: str) -> str:
+        """Single prompt asking for salient questions and the insights answering them."""
+        return _QUESTIONS_AND_INSIGHTS_TEMPLATE.format_map(
+            {"agent_name": agent_name, "statements": statements}
         )
-        return self._call_gemini_json_list(prompt, max_items=3)
+
+    @staticmethod
+    def _split_questions_and_insights(result: Any) -> tuple[list[str], list[str]]:
+        if not isinstance(result, dict):
+            return [], []
+        questions = result.get("questions") or []
+        insights = result.get("insights") or []
+        return [str(q) for q in questions[:3]], [str(i) for i in insights[:3]]
+
+    @staticmethod
+    def _as_list(result: Any, max_items: int) -> list[str]:
+        if isinstance(result, list):
+            return [str(item) for item in result[:max_items]]
+        return []
 
     def _call_gemini_json_list(self, prompt: str, max_items: int = 3) -> list[str]:
         """Call Gemini and parse a JSON list response."""
+        return self._as_list(self._call_gemini_json(prompt, _STRING_LIST_SCHEMA), max_items)
+
+    async def _call_gemini_json_list_async(self, prompt: str, max_items: int = 3) -> list[str]:
+        """Async variant of ``_call_gemini_json_list``."""
+        result = await self._call_gemini_json_async(prompt, _STRING_LIST_SCHEMA)
+        return self._as_list(result, max_items)
+
+    def _call_gemini_json(
+        self, prompt: str, schema: dict, max_output_tokens: int = 512
+    ) -> Any:
+        """Call Gemini with a response schema and return the parsed JSON (or None)."""
+        key = make_key({"prompt": prompt, "schema": schema})
+        if self.cache is not None and (hit := self.cache.get(key)) is not None:
+            return hit
         try:
-            from google import genai
+            response = get_client().models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt,
+                config=_json_config(schema, max_output_tokens),
+            )
+            result = json.loads(response.text)
+            if result and self.cache is not None:
+                self.cache.set(key, result)
+            return result
+        except Exception as e:
+            logger.warning("Gemini JSON call failed: %s", e)
+
+        return None
 
-            client = genai.Client(api_key=settings.gemini_api_key)
-            response = client.models.generate_content(
+    async def _call_gemini_json_async(
+        self, prompt: str, schema: dict, max_output_tokens: int = 512
+    ) -> Any:
+        """Async variant of ``_call_gemini_json``."""
+        key = make_key({"prompt": prompt, "schema": schema})
+        if self.cache is not None and (hit := self.cache.get(key)) is not None:
+            return hit
+        try:
+            response = await get_client().aio.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=prompt,
-                config={
-                    "max_output_tokens": 512,
-                    "temperature": 0.7,
-                },
+                config=_json_config(schema, max_output_tokens),
             )
-            text = response.text.strip()
-            # Strip markdown code fences if present
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-                if text.endswith("```"):
-                    text = text[:-3].strip()
-
-            result = json.loads(text)
-            if isinstance(result, list):
-                return [str(item) for item in result[:max_items]]
+            result = json.loads(response.text)
+            if result and self.cache is not None:
+                self.cache.set(key, result)
+            return result
         except Exception as e:
-            logger.warning("Gemini JSON list call failed: %s", e)
+            logger.warning("Gemini JSON call failed: %s", e)
 
-        return []
+        return None
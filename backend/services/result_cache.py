@@ -0,0 +1,74 @@
+"""
+ResultCache — in-process TTL cache for LLM-derived results (plans, reflections).
+
+Planning and reflection prompts are often identical between calls (same
+persona, memories, mood, location). Keying on a digest of the inputs lets a
+repeat call return the previous result without spending a Gemini round-trip.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from core.config import settings
+
+
+def make_key(payload: Any) -> str:
+    """Stable blake2b digest of a JSON-serializable payload."""
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 3600.0):
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self._default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_default_cache() -> Optional[ResultCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _default_cache
+    if not settings.llm_result_cache_enabled:
+        return None
+    if _default_cache is None:
+        _default_cache = ResultCache(
+            max_entries=settings.llm_result_cache_max_entries,
+            default_ttl=settings.llm_result_cache_ttl_seconds,
+        )
+    return _default_cache
@@ -9,19 +9,48 @@ Persists to JSON on disk.
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import time
-from dataclasses import asdict, dataclass, field
+from bisect import bisect_right
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Strength bands: bisect_right(_THRESHOLDS, strength) (or np.digitize for
+# arrays) gives the index into the parallel description / relation-type tables.
+_THRESHOLDS = (-0.5, 0.0, 0.2, 0.4, 0.7)
+_DESCS = (
+    "strongly dislike",
+    "have tension with",
+    "barely know",
+    "somewhat know",
+    "know well",
+    "are close with",
+)
+_RTYPES = ("enemy", "rival", "acquaintance", "acquaintance", "friend", "close_friend")
+_THRESHOLD_ARRAY = np.array(_THRESHOLDS)
+
 
-@dataclass
+MAX_SHARED_MEMORIES = 10
+MAX_SENTIMENT_HISTORY = 10
+
+
+@dataclass(slots=True)
 class Relationship:
     agent_a: str
     agent_b: str
@@ -30,21 +59,68 @@ class Relationship:
     notes: str = ""
     last_interaction: float = 0.0
     interaction_count: int = 0
-    shared_memories: list[str] = field(default_factory=list)
-    sentiment_history: list[float] = field(default_factory=list)
+    # Bounded deques drop the oldest entry on append, no reslicing needed
+    shared_memories: deque[str] = field(
+        default_factory=lambda: deque(maxlen=MAX_SHARED_MEMORIES)
+    )
+    sentiment_history: deque[float] = field(
+        default_factory=lambda: deque(maxlen=MAX_SENTIMENT_HISTORY)
+    )
     version: int = 0
 
+    def __post_init__(self) -> None:
+        # Loaded relationships arrive with plain lists
+        if not isinstance(self.shared_memories, deque):
+            self.shared_memories = deque(self.shared_memories, maxlen=MAX_SHARED_MEMORIES)
+        if not isinstance(self.sentiment_history, deque):
+            self.sentiment_history = deque(self.sentiment_history, maxlen=MAX_SENTIMENT_HISTORY)
+
+
+def _json_default(obj):
+    """Serialize the deque fields as JSON arrays."""
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _to_dict(rel: Relationship) -> dict:
+    """Shallow field dict for encoding; unlike asdict() nothing is deep-copied."""
+    return {
+        "agent_a": rel.agent_a,
+        "agent_b": rel.agent_b,
+        "relation_type": rel.relation_type,
+        "strength": rel.strength,
+        "notes": rel.notes,
+        "last_interaction": rel.last_interaction,
+        "interaction_count": rel.interaction_count,
+        "shared_memories": rel.shared_memories,
+        "sentiment_history": rel.sentiment_history,
+        "version": rel.version,
+    }
+
 
 class SocialGraph:
     """Manages the social graph of agent relationships."""
 
-    MAX_SHARED_MEMORIES = 10
+    MAX_SHARED_MEMORIES = MAX_SHARED_MEMORIES
 
     def __init__(self, persist_dir: Optional[str] = None):
         self._persist_dir = Path(persist_dir or settings.social_graph_persist_dir)
+        self._shard_dir = self._persist_dir / "relationships"
+        # Pairs changed since the last persist
+        self._dirty: set[tuple[str, str]] = set()
         self._relationships: dict[tuple[str, str], Relationship] = {}
+        # agent_id -> relationships it takes part in (relationships are never removed)
+        self._adj: defaultdict[str, list[Relationship]] = defaultdict(list)
+        # agent_id -> (version signature, rendered format_for_prompt text)
+        self._prompt_cache: dict[str, tuple[int, str]] = {}
+        # Struct-of-arrays mirror of strength / last_interaction for the
+        # vectorized decay sweep; slot i belongs to self._slot_rels[i].
+        self._slots: dict[tuple[str, str], int] = {}
+        self._slot_rels: list[Relationship] = []
+        self._strength = np.zeros(64, dtype=np.float64)
+        self._last = np.zeros(64, dtype=np.float64)
         self._lock = asyncio.Lock()
-        self._pair_locks: dict[tuple[str, str], asyncio.Lock] = {}
         self._load()
 
     @staticmethod
@@ -52,12 +128,6 @@ class SocialGraph:
         """Return a sorted canonical key for a pair of agents."""
         return (min(a, b), max(a, b))
 
-    def _get_pair_lock(self, key: tuple[str, str]) -> asyncio.Lock:
-        """Get or create a per-relationship-pair asyncio lock."""
-        if key not in self._pair_locks:
-            self._pair_locks[key] = asyncio.Lock()
-        return self._pair_locks[key]
-
     def add_relationship(
         self,
         a: str,
@@ -65,16 +135,24 @@ class SocialGraph:
         relation_type: str = "acquaintance",
         strength: float = 0.1,
         notes: str = "",
+        now: Optional[float] = None,
     ) -> Relationship:
-        """Create or update a relationship between two agents."""
+        """Create or update a relationship between two agents.
+
+        ``now`` stamps a newly created relationship; callers that already
+        read the clock pass it through instead of reading it again.
+        """
         key = self._canonical_key(a, b)
         neg_min = settings.relationship_negative_min
-        if key in self._relationships:
-            rel = self._relationships[key]
+        self._invalidate_prompts(key[0], key[1])
+        rel = self._relationships.get(key)
+        if rel is not None:
             rel.relation_type = relation_type
             rel.strength = min(1.0, max(neg_min, strength))
             if notes:
                 rel.notes = notes
+            self._sync_numeric(rel)
+            self._dirty.add(key)
             return rel
 
         rel = Relationship(
@@ -83,15 +161,42 @@ class SocialGraph:
             relation_type=relation_type,
             strength=min(1.0, max(neg_min, strength)),
             notes=notes,
-            last_interaction=time.time(),
+            last_interaction=time.time() if now is None else now,
         )
-        self._relationships[key] = rel
+        self._index(key, rel)
         return rel
 
+    def _index(self, key: tuple[str, str], rel: Relationship) -> None:
+        """Register a new relationship in the pair map and adjacency index."""
+        self._relationships[key] = rel
+        self._dirty.add(key)
+        self._adj[key[0]].append(rel)
+        self._adj[key[1]].append(rel)
+
+        slot = len(self._slot_rels)
+        if slot >= len(self._strength):
+            self._strength = np.resize(self._strength, slot * 2)
+            self._last = np.resize(self._last, slot * 2)
+        self._slots[key] = slot
+        self._slot_rels.append(rel)
+        self._sync_numeric(rel)
+
+    def _sync_numeric(self, rel: Relationship) -> None:
+        """Mirror a relationship's strength and last_interaction into the arrays."""
+        slot = self._slots[(rel.agent_a, rel.agent_b)]
+        self._strength[slot] = rel.strength
+        self._last[slot] = rel.last_interaction
+
+    def _invalidate_prompts(self, a: str, b: str) -> None:
+        """Drop cached prompt text for both endpoints of a changed relationship."""
+        self._prompt_cache.pop(a, None)
+        self._prompt_cache.pop(b, None)
+
     def _apply_interaction(
         self, rel: Relationship, context: str, sentiment: float, now: float
     ) -> None:
         """Apply an interaction update to a relationship (must be called under lock or single-threaded)."""
+        self._invalidate_prompts(rel.agent_a, rel.agent_b)
         neg_min = settings.relationship_negative_min
 
         # Reject stale updates: if this interaction's timestamp is older than
@@ -104,7 +209,6 @@ class SocialGraph:
 
         # Track sentiment history (last 10)
         rel.sentiment_history.append(sentiment)
-        rel.sentiment_history = rel.sentiment_history[-10:]
 
         if not is_stale:
             rel.last_interaction = now
@@ -128,32 +232,25 @@ class SocialGraph:
                 rel.agent_a, rel.agent_b, now, rel.last_interaction,
             )
 
+        self._sync_numeric(rel)
+        self._dirty.add((rel.agent_a, rel.agent_b))
+
         if context:
             rel.shared_memories.append(context[:200])
-            rel.shared_memories = rel.shared_memories[-self.MAX_SHARED_MEMORIES:]
 
     @staticmethod
     def _classify_relationship(rel: Relationship) -> None:
         """Set relation_type based on current strength."""
-        if rel.strength >= 0.7:
-            rel.relation_type = "close_friend"
-        elif rel.strength >= 0.4:
-            rel.relation_type = "friend"
-        elif rel.strength >= 0.0:
-            rel.relation_type = "acquaintance"
-        elif rel.strength >= -0.5:
-            rel.relation_type = "rival"
-        else:
-            rel.relation_type = "enemy"
+        rel.relation_type = _RTYPES[bisect_right(_THRESHOLDS, rel.strength)]
 
     def update_interaction(self, a: str, b: str, context: str = "", sentiment: float = 0.0) -> None:
         """Record an interaction between two agents (sync, for use from tool calls)."""
         key = self._canonical_key(a, b)
-        if key not in self._relationships:
-            self.add_relationship(a, b)
-
-        rel = self._relationships[key]
         now = time.time()
+        rel = self._relationships.get(key)
+        if rel is None:
+            rel = self.add_relationship(a, b, now=now)
+
         self._apply_interaction(rel, context, sentiment, now)
 
         logger.debug(
@@ -164,29 +261,35 @@ class SocialGraph:
     async def update_interaction_async(
         self, a: str, b: str, context: str = "", sentiment: float = 0.0
     ) -> None:
-        """Record an interaction with per-pair locking for concurrent safety."""
-        key = self._canonical_key(a, b)
-        pair_lock = self._get_pair_lock(key)
-
-        async with pair_lock:
-            if key not in self._relationships:
-                self.add_relationship(a, b)
+        """Record an interaction from async code.
 
-            rel = self._relationships[key]
-            now = time.time()
-            self._apply_interaction(rel, context, sentiment, now)
+        The update never awaits, so on the single event loop it runs to
+        completion without interleaving and needs no per-pair lock.
+        """
+        key = self._canonical_key(a, b)
+        rel = self._update_pair(key, context, sentiment, time.time())
 
         logger.debug(
             "Updated interaction (async) %s <-> %s (count=%d, strength=%.2f, sentiment=%.2f, v=%d)",
             a, b, rel.interaction_count, rel.strength, sentiment, rel.version,
         )
 
+    def _update_pair(
+        self, key: tuple[str, str], context: str, sentiment: float, now: float
+    ) -> Relationship:
+        """Create the relationship if needed and apply one interaction."""
+        rel = self._relationships.get(key)
+        if rel is None:
+            # Same clock reading as the interaction, so a new relationship's
+            # first update isn't treated as stale
+            rel = self.add_relationship(*key, now=now)
+
+        self._apply_interaction(rel, context, sentiment, now)
+        return rel
+
     def get_relationships(self, agent_id: str) -> list[Relationship]:
         """Get all relationships for an agent."""
-        return [
-            rel for key, rel in self._relationships.items()
-            if agent_id in key
-        ]
+        return list(self._adj.get(agent_id, ()))
 
     def get_relationship(self, a: str, b: str) -> Optional[Relationship]:
         """Get the relationship between two specific agents."""
@@ -199,82 +302,144 @@ class SocialGraph:
         Only affects relationships where last interaction was > 1 day ago.
         Positive strengths decrease, negative strengths increase (both toward zero).
         """
-        decay_rate = settings.relationship_decay_rate_per_day
+        n = len(self._slot_rels)
+        if n == 0:
+            return
+        decay_amount = settings.relationship_decay_rate_per_day * elapsed_days
         now = time.time()
         one_day = 86400.0
 
-        for rel in self._relationships.values():
-            time_since = now - rel.last_interaction
-            if time_since < one_day:
-                continue
-
-            decay_amount = decay_rate * elapsed_days
-            if rel.strength > 0:
-                rel.strength = max(0.0, rel.strength - decay_amount)
-            elif rel.strength < 0:
-                rel.strength = min(0.0, rel.strength + decay_amount)
-
-            self._classify_relationship(rel)
+        strength = self._strength[:n]
+        due = (now - self._last[:n]) >= one_day
+        pos = due & (strength > 0)
+        neg = due & (strength < 0)
+        strength[pos] = np.maximum(strength[pos] - decay_amount, 0.0)
+        strength[neg] = np.minimum(strength[neg] + decay_amount, 0.0)
+        bands = np.digitize(strength, _THRESHOLD_ARRAY)
+
+        # Write back only what actually changed
+        for i in np.flatnonzero(due):
+            rel = self._slot_rels[i]
+            new_strength = float(strength[i])
+            new_type = _RTYPES[bands[i]]
+            if rel.strength != new_strength or rel.relation_type != new_type:
+                rel.strength = new_strength
+                rel.relation_type = new_type
+                self._invalidate_prompts(rel.agent_a, rel.agent_b)
+                self._dirty.add((rel.agent_a, rel.agent_b))
 
     def format_for_prompt(self, agent_id: str) -> str:
-        """Format relationships as prompt context for an agent."""
-        rels = self.get_relationships(agent_id)
+        """Format relationships as prompt context for an agent.
+
+        The rendered text is cached per agent and reused until one of its
+        relationships changes.
+        """
+        rels = self._adj.get(agent_id, ())
         if not rels:
             return ""
 
+        sig = sum(rel.version for rel in rels)
+        cached = self._prompt_cache.get(agent_id)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+
         lines = ["\n[RELATIONSHIPS] People you know:"]
+        append = lines.append
         for rel in rels:
             other = rel.agent_b if rel.agent_a == agent_id else rel.agent_a
-            if rel.strength >= 0.7:
-                strength_desc = "are close with"
-            elif rel.strength >= 0.4:
-                strength_desc = "know well"
-            elif rel.strength >= 0.2:
-                strength_desc = "somewhat know"
-            elif rel.strength >= 0.0:
-                strength_desc = "barely know"
-            elif rel.strength >= -0.5:
-                strength_desc = "have tension with"
-            else:
-                strength_desc = "strongly dislike"
-
-            line = f"  - {other} ({rel.relation_type}): You {strength_desc} them."
-            if rel.notes:
-                line += f" {rel.notes}"
-            if rel.shared_memories:
-                line += f" Last interaction: {rel.shared_memories[-1]}"
-            lines.append(line)
+            desc = _DESCS[bisect_right(_THRESHOLDS, rel.strength)]
+            notes = f" {rel.notes}" if rel.notes else ""
+            last = (
+                f" Last interaction: {rel.shared_memories[-1]}"
+                if rel.shared_memories
+                else ""
+            )
+            append(f"  - {other} ({rel.relation_type}): You {desc} them.{notes}{last}")
 
-        return "\n".join(lines)
+        text = "\n".join(lines)
+        self._prompt_cache[agent_id] = (sig, text)
+        return text
 
-    def persist(self) -> None:
-        """Save the social graph to disk."""
-        self._persist_dir.mkdir(parents=True, exist_ok=True)
-        filepath = self._persist_dir / "relationships.json"
+    @staticmethod
+    def _shard_name(key: tuple[str, str]) -> str:
+        digest = hashlib.blake2b(f"{key[0]}\x00{key[1]}".encode(), digest_size=8)
+        return f"{digest.hexdigest()}.json"
 
-        data = []
-        for rel in self._relationships.values():
-            data.append(asdict(rel))
+    @staticmethod
+    def _encode(rel: Relationship) -> bytes:
+        # Shards are machine-read; pretty-print only when debugging
+        if orjson is not None:
+            # orjson encodes the dataclass directly in C, no asdict copies
+            option = orjson.OPT_SERIALIZE_DATACLASS
+            if settings.debug:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(rel, default=_json_default, option=option)
+        data = _to_dict(rel)
+        if settings.debug:
+            return json.dumps(data, indent=2, default=_json_default).encode()
+        return json.dumps(data, separators=(",", ":"), default=_json_default).encode()
+
+    def _take_dirty(self) -> list[tuple[str, bytes]]:
+        """Swap out the dirty set and encode those relationships.
+
+        Encoding happens on the caller's thread so the worker thread that
+        writes the files never reads relationships that may be mutating.
+        """
+        dirty, self._dirty = self._dirty, set()
+        return [
+            (self._shard_name(key), self._encode(self._relationships[key]))
+            for key in dirty
+        ]
 
-        with open(filepath, "w") as f:
-            json.dump(data, f, indent=2)
+    def _write_shards(self, shards: list[tuple[str, bytes]]) -> None:
+        """Write one file per relationship, each via an atomic rename."""
+        self._shard_dir.mkdir(parents=True, exist_ok=True)
+        for name, payload in shards:
+            path = self._shard_dir / name
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
 
-        logger.info("Social graph persisted (%d relationships)", len(data))
+    def persist(self) -> None:
+        """Save changed relationships to disk (one shard file each)."""
+        shards = self._take_dirty()
+        self._write_shards(shards)
+        logger.info("Social graph persisted (%d changed relationships)", len(shards))
+
+    async def persist_async(self) -> None:
+        """Like ``persist``, but the file writes run in a worker thread."""
+        async with self._lock:
+            shards = self._take_dirty()
+            if shards:
+                await asyncio.to_thread(self._write_shards, shards)
+        logger.debug("Social graph persisted (%d changed relationships)", len(shards))
 
     def _load(self) -> None:
-        """Load the social graph from disk."""
-        filepath = self._persist_dir / "relationships.json"
-        if not filepath.exists():
-            return
+        """Load the social graph from disk.
 
+        Reads the per-relationship shards; falls back to the legacy single
+        relationships.json, in which case everything is marked dirty so the
+        next persist migrates it to shards.
+        """
+        legacy = self._persist_dir / "relationships.json"
+        # orjson parses the raw bytes in C; stdlib json accepts bytes too
+        loads = orjson.loads if orjson is not None else json.loads
         try:
-            with open(filepath) as f:
-                data = json.load(f)
+            if self._shard_dir.is_dir():
+                data = [loads(path.read_bytes()) for path in self._shard_dir.glob("*.json")]
+                migrate = False
+            elif legacy.exists():
+                data = loads(legacy.read_bytes())
+                migrate = True
+            else:
+                return
 
+            mk, canonical, index = Relationship, self._canonical_key, self._index
             for item in data:
-                rel = Relationship(**item)
-                key = self._canonical_key(rel.agent_a, rel.agent_b)
-                self._relationships[key] = rel
+                rel = mk(**item)
+                index(canonical(rel.agent_a, rel.agent_b), rel)
+            if not migrate:
+                self._dirty.clear()
 
             logger.info("Loaded social graph (%d relationships)", len(self._relationships))
         except Exception as e:
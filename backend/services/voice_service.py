@@ -1,11 +1,12 @@
 """Gemini 2.5 Flash TTS wrapper with per-agent voice and mood-based style."""
 
-import io
+import asyncio
+import hashlib
 import logging
+import re
 import struct
-import wave
-from google import genai
-from google.genai import types
+import sys
+from collections import OrderedDict
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -33,24 +34,82 @@ MOOD_STYLE: dict[str, str] = {
     "neutral": "Say in a calm, conversational tone:",
 }
 
+# Mood -> ready-to-concatenate prompt prefix (style plus separating space)
+_MOOD_PREFIX: dict[str, str] = {
+    sys.intern(mood): sys.intern(f"{style} ") for mood, style in MOOD_STYLE.items()
+}
+
+# Sample rate from a mime_type like "audio/L16;rate=24000"
+_RATE_RE = re.compile(r"rate=(\d+)")
+DEFAULT_SAMPLE_RATE = 24000
+
+# 44-byte RIFF/WAVE header for mono 16-bit PCM
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Above this many PCM bytes, WAV framing runs in a worker thread
+_WRAP_IN_THREAD_MIN_BYTES = 64 * 1024
+
+# Encoded WAV responses kept in memory for repeated lines
+TTS_CACHE_MAX_ENTRIES = 512
+
 
 class VoiceService:
     def __init__(self, api_key: str):
+        # Imported here so importing this module (e.g. for AGENT_VOICES)
+        # doesn't pay for loading the SDK
+        from google import genai
+        from google.genai import types
+
+        self._types = types
         self.client = genai.Client(api_key=api_key)
+        # (voice, mood, text digest) -> WAV bytes, least recently used first
+        self._cache: OrderedDict[tuple[str, str, bytes], bytes] = OrderedDict()
+        self._cache_max = TTS_CACHE_MAX_ENTRIES
+        # Requests currently being synthesized, so identical ones share a call
+        self._inflight: dict[tuple[str, str, bytes], asyncio.Task] = {}
 
     def _get_voice(self, agent_id: str) -> str:
         return AGENT_VOICES.get(agent_id, DEFAULT_VOICE)
 
     def _get_style_prompt(self, mood: str) -> str:
-        return MOOD_STYLE.get(mood, MOOD_STYLE["neutral"])
+        return _MOOD_PREFIX.get(mood, _MOOD_PREFIX["neutral"])
 
     async def synthesize(self, agent_id: str, text: str, mood: str = "neutral") -> bytes:
-        """Generate TTS audio bytes for the given text using Gemini 2.5 Flash TTS."""
-        voice_name = self._get_voice(agent_id)
-        style = self._get_style_prompt(mood)
-        prompt = f"{style} {text}"
+        """Generate TTS audio bytes for the given text using Gemini 2.5 Flash TTS.
 
-        logger.info("TTS request: agent=%s voice=%s mood=%s", agent_id, voice_name, mood)
+        Results are cached per (voice, mood, text), and concurrent identical
+        requests share a single API call.
+        """
+        voice_name = self._get_voice(agent_id)
+        key = (voice_name, mood, hashlib.blake2b(text.encode(), digest_size=16).digest())
+
+        wav = self._cache.get(key)
+        if wav is not None:
+            self._cache.move_to_end(key)
+            return wav
+
+        task = self._inflight.get(key)
+        if task is None:
+            logger.info("TTS request: agent=%s voice=%s mood=%s", agent_id, voice_name, mood)
+            task = asyncio.ensure_future(self._generate(voice_name, mood, text))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # Shielded so one caller cancelling doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple[str, str, bytes], task: asyncio.Task) -> None:
+        """Retire an in-flight request and cache its audio if it succeeded."""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._cache[key] = task.result()
+        if len(self._cache) > self._cache_max:
+            self._cache.popitem(last=False)
+
+    async def _generate(self, voice_name: str, mood: str, text: str) -> bytes:
+        """Call the TTS model and return the response as WAV bytes."""
+        prompt = self._get_style_prompt(mood) + text
+        types = self._types
 
         response = await self.client.aio.models.generate_content(
             model="gemini-2.5-flash-preview-tts",
@@ -71,20 +130,20 @@ class VoiceService:
         raw_pcm = part.inline_data.data
         mime = part.inline_data.mime_type or ""
 
-        # Parse sample rate from mime_type like "audio/L16;rate=24000"
-        sample_rate = 24000
-        if "rate=" in mime:
-            try:
-                sample_rate = int(mime.split("rate=")[1].split(";")[0])
-            except (ValueError, IndexError):
-                pass
-
-        # Wrap raw PCM in a proper WAV header so browsers can play it
-        buf = io.BytesIO()
-        with wave.open(buf, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(sample_rate)
-            wf.writeframes(raw_pcm)
-
-        return buf.getvalue()
+        m = _RATE_RE.search(mime)
+        sample_rate = int(m.group(1)) if m else DEFAULT_SAMPLE_RATE
+
+        if len(raw_pcm) >= _WRAP_IN_THREAD_MIN_BYTES:
+            # Copying a large payload would otherwise stall the event loop
+            return await asyncio.to_thread(self._wrap_wav, raw_pcm, sample_rate)
+        return self._wrap_wav(raw_pcm, sample_rate)
+
+    @staticmethod
+    def _wrap_wav(raw_pcm: bytes, sample_rate: int) -> bytes:
+        """Wrap raw PCM in a proper WAV header so browsers can play it."""
+        header = _WAV_HEADER.pack(
+            b"RIFF", 36 + len(raw_pcm), b"WAVE",
+            b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,  # PCM, mono, 16-bit
+            b"data", len(raw_pcm),
+        )
+        return header + raw_pcm
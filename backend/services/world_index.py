@@ -0,0 +1,136 @@
+"""
+WorldIndex — flat lookups over the environment tree.
+
+The tree only changes shape on map expansion, so instead of walking it on
+every tool call we build id -> node / id -> parent maps once and rebuild
+them when ``WorldState.version`` moves.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from models.state import EnvironmentNode, NodeType, WorldState
+
+
+class WorldIndex:
+    """Id-keyed views of one version of the environment tree."""
+
+    __slots__ = (
+        "version", "nodes_by_id", "parent_by_id", "walkable_locations", "valid_ids",
+        "subtree_ids",
+        "_free_masks", "_inner_tiles", "_valid_hint", "descriptions",
+        "_views",
+    )
+
+    def __init__(self, root: EnvironmentNode, version: int):
+        self.version = version
+        self.nodes_by_id: dict[str, EnvironmentNode] = {}
+        self.parent_by_id: dict[str, EnvironmentNode] = {}
+        # (id, name) of every walkable, non-object node, in tree order
+        self.walkable_locations: list[tuple[str, str]] = []
+
+        # Iterative pre-order walk; the first node seen wins on duplicate ids,
+        # matching what the old recursive searches returned.
+        preorder: list[EnvironmentNode] = []
+        stack: list[tuple[EnvironmentNode, EnvironmentNode | None]] = [(root, None)]
+        while stack:
+            node, parent = stack.pop()
+            preorder.append(node)
+            self.nodes_by_id.setdefault(node.id, node)
+            if parent is not None:
+                self.parent_by_id.setdefault(node.id, parent)
+            if node.node_type != NodeType.OBJECT and node.walkable:
+                self.walkable_locations.append((node.id, node.name))
+            stack.extend((child, node) for child in reversed(node.children))
+
+        self.valid_ids = frozenset(loc_id for loc_id, _ in self.walkable_locations)
+
+        # id -> ids of the node and everything below it, for containment
+        # checks; built bottom-up by visiting the pre-order list in reverse.
+        self.subtree_ids: dict[str, frozenset[str]] = {}
+        below: dict[int, frozenset[str]] = {}
+        for node in reversed(preorder):
+            ids = frozenset({node.id}).union(*(below[id(child)] for child in node.children))
+            below[id(node)] = ids
+        for node in preorder:
+            self.subtree_ids.setdefault(node.id, below[id(node)])
+        # Built lazily per node: open-tile bitmap, and the open tiles nearest the centre
+        self._free_masks: dict[str, np.ndarray] = {}
+        self._inner_tiles: dict[str, np.ndarray] = {}
+        self._valid_hint: str | None = None
+        # Rendered node descriptions (WorldTools._describe_node), by node id
+        self.descriptions: dict[str, str] = {}
+        self._views: dict[str, tuple[str, str]] = {}
+
+    @property
+    def valid_hint(self) -> str:
+        """The 'valid locations' suffix for failed moves, built on first use."""
+        if self._valid_hint is None:
+            self._valid_hint = "Valid locations you can move to: " + ", ".join(
+                f"{name} ({loc_id})" for loc_id, name in self.walkable_locations
+            )
+        return self._valid_hint
+
+    def location_view(self, node: EnvironmentNode) -> tuple[str, str]:
+        """Static parts of an observation of *node*: (header + objects, nearby locations).
+
+        Either block is rendered once per world version; the nearby block is
+        empty when the node has no walkable siblings.
+        """
+        view = self._views.get(node.id)
+        if view is None:
+            lines = [f"You are at: {node.name}", f"Description: {node.description}"]
+            objects = [c for c in node.children if c.node_type == NodeType.OBJECT]
+            if objects:
+                lines.append("\nObjects here:")
+                lines.extend(f"  - {obj.name} ({obj.id}): {obj.description}" for obj in objects)
+
+            nearby = ""
+            parent = self.parent_by_id.get(node.id)
+            if parent is not None:
+                siblings = [c for c in parent.children if c.id != node.id and c.walkable]
+                if siblings:
+                    nearby = "\nNearby locations you can go to:\n" + "\n".join(
+                        f"  - {sib.name} ({sib.id})" for sib in siblings
+                    )
+
+            view = self._views[node.id] = ("\n".join(lines), nearby)
+        return view
+
+    def free_mask(self, node: EnvironmentNode) -> np.ndarray:
+        """(h, w) bool bitmap of the node's tiles not covered by a non-walkable child."""
+        mask = self._free_masks.get(node.id)
+        if mask is None:
+            mask = np.ones((node.h, node.w), dtype=bool)
+            for child in node.children:
+                if not child.walkable:
+                    x0, y0 = child.x - node.x, child.y - node.y
+                    mask[max(y0, 0):max(y0 + child.h, 0), max(x0, 0):max(x0 + child.w, 0)] = False
+            self._free_masks[node.id] = mask
+        return mask
+
+    def inner_tiles(self, node: EnvironmentNode) -> np.ndarray:
+        """Row-major offsets of the node's open tiles in the inner ~60% nearest its centre.
+
+        Tiles near the centre are more likely to be walkable on the visual
+        tilemap, where edges tend to have walls/structures.
+        """
+        tiles = self._inner_tiles.get(node.id)
+        if tiles is None:
+            open_idx = np.flatnonzero(self.free_mask(node))
+            dy, dx = np.divmod(open_idx, node.w)
+            dist = (dx - node.w / 2) ** 2 + (dy - node.h / 2) ** 2
+            inner_count = max(1, open_idx.size * 3 // 5)
+            tiles = open_idx[np.argsort(dist, kind="stable")[:inner_count]]
+            self._inner_tiles[node.id] = tiles
+        return tiles
+
+
+def get_world_index(world_state: WorldState) -> WorldIndex:
+    """Return the index for the current world version, rebuilding if stale."""
+    index = world_state._index
+    if index is None or index.version != world_state.version:
+        index = WorldIndex(world_state.environment_root, world_state.version)
+        world_state._index = index
+    return index
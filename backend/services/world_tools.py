@@ -14,13 +14,16 @@ shared WorldState reference.  The toolkit exposes five tools:
 from __future__ import annotations
 
 import logging
+import re
 import time
+from collections import deque
 from typing import TYPE_CHECKING, Optional
 
 from agno.tools import Toolkit
 
 from core.config import settings
-from models.state import AgentState, EnvironmentNode, NodeType, WorldState
+from models.state import AgentState, EnvironmentNode, WorldState
+from services.world_index import WorldIndex, get_world_index
 
 if TYPE_CHECKING:
     from services.memory_store import MemoryStore
@@ -28,6 +31,30 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_U64 = 0xFFFFFFFFFFFFFFFF  # mask for the 64-bit tile-pick hash
+
+# Sentiment lexicon for _quick_sentiment
+_POSITIVE_WORDS: frozenset[str] = frozenset({
+    "love", "like", "great", "happy", "wonderful", "amazing", "good",
+    "friend", "thanks", "thank", "enjoy", "glad", "nice", "kind",
+    "welcome", "beautiful", "helpful", "appreciate", "excited", "joy",
+})
+_NEGATIVE_WORDS: frozenset[str] = frozenset({
+    "hate", "dislike", "angry", "bad", "terrible", "awful", "annoying",
+    "stupid", "ugly", "enemy", "rude", "mean", "horrible", "disgusting",
+    "furious", "sad", "upset", "disappointed", "frustrating", "worst",
+})
+
+# Keyword -> +1 / -1, matched in one regex scan
+_SENTIMENT_SCORE: dict[str, int] = {
+    **dict.fromkeys(_POSITIVE_WORDS, 1),
+    **dict.fromkeys(_NEGATIVE_WORDS, -1),
+}
+_SENTIMENT_RE = re.compile(r"\b(" + "|".join(map(re.escape, _SENTIMENT_SCORE)) + r")\b")
+# Texts shorter than the shortest keyword, or ASCII with no letters, score 0
+_SENTIMENT_MIN_LEN = min(map(len, _SENTIMENT_SCORE))
+_ASCII_LETTER_RE = re.compile(r"[A-Za-z]")
+
 
 class WorldTools(Toolkit):
     """Per-agent toolkit for world interaction."""
@@ -44,6 +71,8 @@ class WorldTools(Toolkit):
         self.world_state = world_state
         self.memory_store = memory_store
         self.social_graph = social_graph
+        # Memories recorded by tool calls, written in one batch by flush_memories
+        self._pending_memories: list[dict] = []
 
         self.register(self.move_to_location)
         self.register(self.talk_to_agent)
@@ -57,79 +86,81 @@ class WorldTools(Toolkit):
 
     def _find_agent(self, agent_id: str) -> Optional[AgentState]:
         """Find an agent by id in the world state."""
-        for agent in self.world_state.agents:
-            if agent.id == agent_id:
-                return agent
-        return None
-
-    def _find_node(self, node_id: str, root: Optional[EnvironmentNode] = None) -> Optional[EnvironmentNode]:
-        """Recursively find an EnvironmentNode by id."""
-        if root is None:
-            root = self.world_state.environment_root
-        if root.id == node_id:
-            return root
-        for child in root.children:
-            found = self._find_node(node_id, child)
-            if found:
-                return found
-        return None
-
-    def _get_parent_node(self, node_id: str, root: Optional[EnvironmentNode] = None) -> Optional[EnvironmentNode]:
+        return self.world_state.get_agent(agent_id)
+
+    @property
+    def _index(self) -> WorldIndex:
+        """Flat id lookups for the current version of the environment tree."""
+        return get_world_index(self.world_state)
+
+    def _find_node(self, node_id: str) -> Optional[EnvironmentNode]:
+        """Find an EnvironmentNode by id."""
+        return self._index.nodes_by_id.get(node_id)
+
+    def _get_parent_node(self, node_id: str) -> Optional[EnvironmentNode]:
         """Find the parent of a node."""
-        if root is None:
-            root = self.world_state.environment_root
-        for child in root.children:
-            if child.id == node_id:
-                return root
-            found = self._get_parent_node(node_id, child)
-            if found:
-                return found
-        return None
+        return self._index.parent_by_id.get(node_id)
 
     def _record(self, text: str, category: str) -> None:
-        """Record an observation/action as a memory if a memory store is available."""
+        """Queue an observation/action as a memory if a memory store is available."""
         if self.memory_store is not None:
-            self.memory_store.add_memory(
-                self.agent_id, text, metadata={"category": category}
-            )
+            self._pending_memories.append({"text": text, "metadata": {"category": category}})
+
+    def flush_memories(self) -> list[int]:
+        """Write the memories queued by tool calls in one batch. Returns importances.
+
+        Called by the agent manager at the end of each agent run.
+        """
+        if not self._pending_memories or self.memory_store is None:
+            return []
+        batch, self._pending_memories = self._pending_memories, []
+        return self.memory_store.add_memories(self.agent_id, batch)
 
     def _get_agents_at_location(self, location_id: str) -> list[AgentState]:
         """Return all agents currently at a location."""
-        return [a for a in self.world_state.agents if a.location_id == location_id]
+        return self.world_state.agents_at(location_id)
 
     def _describe_node(self, node: EnvironmentNode, indent: int = 0) -> str:
-        """Build a human-readable description of a node and its children."""
-        prefix = "  " * indent
-        lines = [f"{prefix}- {node.name} ({node.node_type.value}): {node.description}"]
-        for child in node.children:
-            lines.append(self._describe_node(child, indent + 1))
+        """Build a human-readable description of a node and its children.
+
+        Top-level renders are cached on the world index, so they are reused
+        until the environment tree changes.
+        """
+        if indent == 0:
+            descriptions = self._index.descriptions
+            text = descriptions.get(node.id)
+            if text is None:
+                text = descriptions[node.id] = self._render_node(node, 0)
+            return text
+        return self._render_node(node, indent)
+
+    @staticmethod
+    def _render_node(node: EnvironmentNode, indent: int) -> str:
+        # Iterative pre-order walk into one list, joined once at the end
+        lines: list[str] = []
+        stack = [(node, indent)]
+        while stack:
+            n, depth = stack.pop()
+            lines.append(f"{'  ' * depth}- {n.name} ({n.node_type.value}): {n.description}")
+            stack.extend((child, depth + 1) for child in reversed(n.children))
         return "\n".join(lines)
 
     def _collect_valid_locations(self) -> list[tuple[str, str]]:
         """Return (id, name) pairs for every walkable, non-object node in the world."""
-        results: list[tuple[str, str]] = []
-
-        def _gather(node: EnvironmentNode) -> None:
-            if node.node_type not in (NodeType.OBJECT,) and node.walkable:
-                results.append((node.id, node.name))
-            for child in node.children:
-                _gather(child)
-
-        _gather(self.world_state.environment_root)
-        return results
+        return self._index.walkable_locations
 
     def _log_location_event(self, location_id: str, event: str) -> None:
         """Append an event to location_events, capping per config."""
-        if location_id not in self.world_state.location_events:
-            self.world_state.location_events[location_id] = []
-        self.world_state.location_events[location_id].append({
+        events = self.world_state.location_events.get(location_id)
+        if events is None or events.maxlen is None:
+            # New location, or events loaded from disk without a bound
+            events = deque(events or (), maxlen=settings.event_log_max_per_location)
+            self.world_state.location_events[location_id] = events
+        events.append({
             "agent_id": self.agent_id,
             "event": event,
             "timestamp": time.time(),
         })
-        max_events = settings.event_log_max_per_location
-        self.world_state.location_events[location_id] = \
-            self.world_state.location_events[location_id][-max_events:]
 
     def _find_walkable_position(self, node: EnvironmentNode) -> tuple[int, int]:
         """Find a walkable tile position within a node's bounds.
@@ -138,55 +169,36 @@ class WorldTools(Toolkit):
         Prefers tiles near the center of the node (more likely to be
         walkable on the visual tilemap).
         """
-        import random
-
-        # Collect blocked tiles from non-walkable children
-        blocked: set[tuple[int, int]] = set()
-        for child in node.children:
-            if not child.walkable:
-                for dx in range(child.w):
-                    for dy in range(child.h):
-                        blocked.add((child.x + dx, child.y + dy))
-
-        # Collect all open tiles
-        open_tiles = [
-            (node.x + dx, node.y + dy)
-            for dy in range(node.h)
-            for dx in range(node.w)
-            if (node.x + dx, node.y + dy) not in blocked
-        ]
-
-        if open_tiles:
-            # Prefer tiles near the center of the node
-            cx = node.x + node.w / 2
-            cy = node.y + node.h / 2
-            open_tiles.sort(key=lambda t: (t[0] - cx) ** 2 + (t[1] - cy) ** 2)
-            inner_count = max(1, len(open_tiles) * 3 // 5)
-            return random.choice(open_tiles[:inner_count])
-
-        # Fallback: center of node
-        return (node.x + node.w // 2, node.y + node.h // 2)
+        return self._choose_tile(node, seed=hash((self.agent_id, node.id)))
+
+    def _choose_tile(self, node: EnvironmentNode, seed: int) -> tuple[int, int]:
+        """Pick one of the node's open tiles near its centre, seeded by *seed*."""
+        tiles = self._index.inner_tiles(node)
+        if tiles.size == 0:
+            # Fallback: center of node
+            return (node.x + node.w // 2, node.y + node.h // 2)
+
+        # One splitmix64-style mixing step is plenty to spread the seed;
+        # no need to build a full generator for a single pick
+        h = seed & _U64
+        h ^= h >> 30
+        h = (h * 0xBF58476D1CE4E5B9) & _U64
+        h ^= h >> 27
+        dy, dx = divmod(int(tiles[h % tiles.size]), node.w)
+        return (node.x + dx, node.y + dy)
 
     @staticmethod
     def _quick_sentiment(text: str) -> float:
         """Keyword-based sentiment scoring from -1.0 to 1.0. No LLM call."""
-        positive = {
-            "love", "like", "great", "happy", "wonderful", "amazing", "good",
-            "friend", "thanks", "thank", "enjoy", "glad", "nice", "kind",
-            "welcome", "beautiful", "helpful", "appreciate", "excited", "joy",
-        }
-        negative = {
-            "hate", "dislike", "angry", "bad", "terrible", "awful", "annoying",
-            "stupid", "ugly", "enemy", "rude", "mean", "horrible", "disgusting",
-            "furious", "sad", "upset", "disappointed", "frustrating", "worst",
-        }
-        words = text.lower().split()
-        pos_count = sum(1 for w in words if w.strip(".,!?\"'") in positive)
-        neg_count = sum(1 for w in words if w.strip(".,!?\"'") in negative)
-        total = pos_count + neg_count
-        if total == 0:
+        # Skip the lowercase copy and keyword scan when nothing can match
+        if len(text) < _SENTIMENT_MIN_LEN or (
+            text.isascii() and _ASCII_LETTER_RE.search(text) is None
+        ):
+            return 0.0
+        scores = [_SENTIMENT_SCORE[m] for m in _SENTIMENT_RE.findall(text.lower())]
+        if not scores:
             return 0.0
-        return (pos_count - neg_count) / total
+        return sum(scores) / len(scores)
 
     # ------------------------------------------------------------------
     # Tools (registered in __init__)
@@ -206,58 +218,27 @@ class WorldTools(Toolkit):
             return f"Error: agent '{self.agent_id}' not found."
 
         target = self._find_node(location_id)
+        index = self._index
 
-        valid_locations = self._collect_valid_locations()
-        valid_ids = {loc_id for loc_id, _ in valid_locations}
-        valid_hint = (
-            "Valid locations you can move to: "
-            + ", ".join(f"{name} ({loc_id})" for loc_id, name in valid_locations)
-        )
-
+        # The hint is only rendered (once per world version) on the error paths
         if not target:
             return (
                 f"Error: location '{location_id}' does not exist. "
-                f"{valid_hint}"
+                f"{index.valid_hint}"
             )
 
-        if not target.walkable or location_id not in valid_ids:
+        if not target.walkable or location_id not in index.valid_ids:
             return (
                 f"You can't go to '{target.name}' — it is not reachable. "
-                f"{valid_hint}"
+                f"{index.valid_hint}"
             )
 
         old_location = agent.location_id
 
         # Find an open tile within the target node — avoid non-walkable children.
-        blocked: set[tuple[int, int]] = set()
-        for child in target.children:
-            if not child.walkable:
-                for cx in range(child.x, child.x + child.w):
-                    for cy in range(child.y, child.y + child.h):
-                        blocked.add((cx, cy))
-
-        open_tiles = [
-            (tx, ty)
-            for tx in range(target.x, target.x + target.w)
-            for ty in range(target.y, target.y + target.h)
-            if (tx, ty) not in blocked
-        ]
+        dest_x, dest_y = self._choose_tile(target, seed=hash((self.agent_id, location_id)))
 
-        if open_tiles:
-            import random
-            # Prefer tiles near the center of the zone (more likely walkable
-            # on the visual tilemap where edges tend to have walls/structures).
-            cx = target.x + target.w / 2
-            cy = target.y + target.h / 2
-            open_tiles.sort(key=lambda t: (t[0] - cx) ** 2 + (t[1] - cy) ** 2)
-            # Pick randomly from the inner ~60% of tiles (closest to center)
-            inner_count = max(1, len(open_tiles) * 3 // 5)
-            dest_x, dest_y = random.choice(open_tiles[:inner_count])
-        else:
-            # Fallback: center of the target zone
-            dest_x, dest_y = target.x + target.w // 2, target.y + target.h // 2
-
-        agent.location_id = location_id
+        self.world_state.move_agent(agent, location_id)
         agent.x = dest_x
         agent.y = dest_y
         agent.current_action = f"Walking to {target.name}"
@@ -295,8 +276,6 @@ class WorldTools(Toolkit):
         self._record(f"Said to {target.name}: \"{message}\"", "conversation")
 
         # Create pending message for the target agent
-        if target_agent_id not in self.world_state.pending_messages:
-            self.world_state.pending_messages[target_agent_id] = []
         self.world_state.pending_messages[target_agent_id].append({
             "from_agent": self.agent_id,
             "from_name": me.name,
@@ -335,24 +314,22 @@ class WorldTools(Toolkit):
         if not me:
             return f"Error: agent '{self.agent_id}' not found."
 
-        obj = self._find_node(object_id)
+        # One index lookup serves the object, location and parent checks
+        index = self._index
+        obj = index.nodes_by_id.get(object_id)
         if not obj:
             return f"There is no object called '{object_id}' nearby."
 
         # Check the object is in the agent's current location subtree
-        location_node = self._find_node(me.location_id)
-        if not location_node:
+        subtree_ids = index.subtree_ids
+        location_subtree = subtree_ids.get(me.location_id)
+        if location_subtree is None:
             return "Error: your current location could not be found."
 
-        def _contains(parent: EnvironmentNode, target_id: str) -> bool:
-            if parent.id == target_id:
-                return True
-            return any(_contains(c, target_id) for c in parent.children)
-
         # Also check parent — the agent might be in a room inside a building
-        parent = self._get_parent_node(me.location_id)
-        in_location = _contains(location_node, object_id)
-        in_parent = parent is not None and _contains(parent, object_id)
+        parent = index.parent_by_id.get(me.location_id)
+        in_location = object_id in location_subtree
+        in_parent = parent is not None and object_id in subtree_ids[parent.id]
 
         if not in_location and not in_parent:
             return f"The {obj.name} is not in your current location."
@@ -374,44 +351,40 @@ class WorldTools(Toolkit):
         if not me:
             return f"Error: agent '{self.agent_id}' not found."
 
-        location = self._find_node(me.location_id)
+        index = self._index
+        location = index.nodes_by_id.get(me.location_id)
         if not location:
             return "You can't see anything — your location is unknown."
 
-        lines: list[str] = []
-        lines.append(f"You are at: {location.name}")
-        lines.append(f"Description: {location.description}")
-
-        # Objects in this location
-        objects = [c for c in location.children if c.node_type == NodeType.OBJECT]
-        if objects:
-            lines.append("\nObjects here:")
-            for obj in objects:
-                lines.append(f"  - {obj.name} ({obj.id}): {obj.description}")
+        # Location header, objects here and adjacent areas are static per
+        # world version; only people and recent activity are rendered per call
+        header, nearby = index.location_view(location)
+        lines = [header]
 
         # Other agents at this location
-        others = [a for a in self._get_agents_at_location(me.location_id) if a.id != self.agent_id]
-        if others:
+        people = [
+            f"  - {other.name} ({other.id}): {other.current_action}"
+            for other in self._get_agents_at_location(me.location_id)
+            if other.id != self.agent_id
+        ]
+        if people:
             lines.append("\nPeople here:")
-            for other in others:
-                lines.append(f"  - {other.name} ({other.id}): {other.current_action}")
+            lines.extend(people)
 
         # Sibling locations (adjacent areas)
-        parent = self._get_parent_node(me.location_id)
-        if parent:
-            siblings = [c for c in parent.children if c.id != me.location_id and c.walkable]
-            if siblings:
-                lines.append("\nNearby locations you can go to:")
-                for sib in siblings:
-                    lines.append(f"  - {sib.name} ({sib.id})")
-
-        # Recent events at this location by other agents
-        loc_events = self.world_state.location_events.get(me.location_id, [])
-        other_events = [e for e in loc_events if e.get("agent_id") != self.agent_id]
-        if other_events:
+        if nearby:
+            lines.append(nearby)
+
+        # Last few events at this location by other agents, newest scanned first
+        recent: list[str] = []
+        for evt in reversed(self.world_state.location_events.get(me.location_id, ())):
+            if evt.get("agent_id") != self.agent_id:
+                recent.append(f"  - {evt['event']}")
+                if len(recent) == 4:
+                    break
+        if recent:
             lines.append("\nRecent activity here:")
-            for evt in other_events[-4:]:
-                lines.append(f"  - {evt['event']}")
+            lines.extend(reversed(recent))
 
         observation = "\n".join(lines)
         self._record(observation, "observation")
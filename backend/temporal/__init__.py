@@ -32,6 +32,8 @@ Quick start::
 from temporal._types import (
     AgentAction,
     AgentStateUpdate,
+    BatchLLMProvider,
+    BatchMemoryProvider,
     DailyPlan,
     DailyPlanRequest,
     LLMProvider,
@@ -67,6 +69,8 @@ __all__ = [
     "LLMProvider",
     "MemoryProvider",
     "StateProvider",
+    "BatchLLMProvider",
+    "BatchMemoryProvider",
     # DTOs
     "LLMRequest",
     "LLMResponse",
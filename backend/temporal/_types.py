@@ -17,7 +17,7 @@ from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMRequest:
     """Payload sent to the LLM provider."""
     prompt: str
@@ -27,16 +27,17 @@ class LLMRequest:
     extra: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Payload returned from the LLM provider."""
     text: str
     model_name: str = ""
     prompt_tokens: int = 0
     completion_tokens: int = 0
+    cache_hit: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryQuery:
     """Input for memory retrieval."""
     agent_id: str
@@ -44,14 +45,14 @@ class MemoryQuery:
     top_k: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class MemoryResult:
     """Output of memory retrieval."""
     agent_id: str
     memories: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentAction:
     """An action an agent has decided to take."""
     agent_id: str
@@ -61,7 +62,7 @@ class AgentAction:
     target_y: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentStateUpdate:
     """Result of applying an agent action to the world."""
     agent_id: str
@@ -71,7 +72,7 @@ class AgentStateUpdate:
     new_y: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DailyPlanRequest:
     """Input for daily-plan generation."""
     agent_id: str
@@ -80,7 +81,7 @@ class DailyPlanRequest:
     previous_day_summary: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DailyPlan:
     """A generated daily plan."""
     agent_id: str
@@ -101,6 +102,19 @@ class LLMProvider(Protocol):
         ...
 
 
+@runtime_checkable
+class BatchLLMProvider(LLMProvider, Protocol):
+    """An LLM provider that can serve several requests in one call.
+
+    Optional: the ``call_llm_batch`` activity uses ``call_batch`` when the
+    registered provider has it and otherwise fans out to ``call``.
+    """
+
+    async def call_batch(self, requests: List[LLMRequest]) -> List[LLMResponse]:
+        """Execute the requests and return the responses in the same order."""
+        ...
+
+
 @runtime_checkable
 class MemoryProvider(Protocol):
     """Anything that can retrieve agent memories."""
@@ -110,6 +124,19 @@ class MemoryProvider(Protocol):
         ...
 
 
+@runtime_checkable
+class BatchMemoryProvider(MemoryProvider, Protocol):
+    """A memory provider that can answer several queries in one call.
+
+    Optional: the ``retrieve_memories_batch`` activity uses
+    ``retrieve_batch`` when available and otherwise fans out to ``retrieve``.
+    """
+
+    async def retrieve_batch(self, queries: List[MemoryQuery]) -> List[MemoryResult]:
+        """Retrieve memories for each query, in the same order."""
+        ...
+
+
 @runtime_checkable
 class StateProvider(Protocol):
     """Anything that can apply an agent action to the world state."""
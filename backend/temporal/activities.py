@@ -8,22 +8,59 @@ reusable with any LLM, memory store, or state executor.
 
 from __future__ import annotations
 
+import asyncio
 import json
+from datetime import date
+from typing import Dict, List, Tuple
 
 from temporalio import activity
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+from temporal import llm_cache
 from temporal._registry import get_registry
 from temporal._types import (
     AgentAction,
     AgentStateUpdate,
+    BatchLLMProvider,
+    BatchMemoryProvider,
     DailyPlan,
     DailyPlanRequest,
+    LLMProvider,
     LLMRequest,
     LLMResponse,
+    MemoryProvider,
     MemoryQuery,
     MemoryResult,
+    StateProvider,
 )
 
+# The registry is a process-wide singleton; bind it once. Providers are read
+# from it on each call (a single attribute load) so re-registration still
+# takes effect; require_*() only runs to raise the "not registered" error.
+_registry = get_registry()
+
+
+# Plans generated today, keyed by (agent_id, ISO date, previous-day summary),
+# so a re-run of the same planning step doesn't call the LLM again
+_PLAN_CACHE: Dict[Tuple[str, str, str], DailyPlan] = {}
+
+
+def _llm() -> LLMProvider:
+    return _registry.llm or _registry.require_llm()
+
+
+def _memory() -> MemoryProvider:
+    return _registry.memory or _registry.require_memory()
+
+
+def _state() -> StateProvider:
+    return _registry.state or _registry.require_state()
+
+
 # ---------------------------------------------------------------------------
 # Activities
 # ---------------------------------------------------------------------------
@@ -34,21 +71,46 @@ async def call_llm(request: LLMRequest) -> LLMResponse:
     """Call the registered LLM provider and return the response.
 
     Temporal will automatically retry on transient failures according to
-    the retry policy set by the calling workflow.
+    the retry policy set by the calling workflow.  Identical requests are
+    answered from the response cache (see ``llm_cache``).
     """
-    provider = get_registry().require_llm()
+    provider = _llm()
 
     activity.logger.info(
         "call_llm: model=%s prompt_len=%d", request.model_name, len(request.prompt)
     )
 
-    return await provider.call(request)
+    response = await llm_cache.get_or_call(request, provider.call)
+    if response.cache_hit:
+        activity.logger.info("call_llm: cache hit")
+    return response
+
+
+@activity.defn(name="call_llm_batch")
+async def call_llm_batch(requests: List[LLMRequest]) -> List[LLMResponse]:
+    """Call the LLM provider for several agents' requests at once.
+
+    Providers implementing ``call_batch`` get the whole batch in one call;
+    others have the requests issued concurrently.  Cached requests are not
+    sent at all.  Responses keep the order of ``requests``.
+    """
+    provider = _llm()
+
+    activity.logger.info("call_llm_batch: requests=%d", len(requests))
+
+    if isinstance(provider, BatchLLMProvider):
+        return await llm_cache.get_or_call_batch(requests, provider.call_batch)
+    return list(
+        await asyncio.gather(
+            *(llm_cache.get_or_call(r, provider.call) for r in requests)
+        )
+    )
 
 
 @activity.defn(name="retrieve_memories")
 async def retrieve_memories(query: MemoryQuery) -> MemoryResult:
     """Retrieve relevant memories via the registered memory provider."""
-    provider = get_registry().require_memory()
+    provider = _memory()
 
     activity.logger.info(
         "retrieve_memories: agent=%s context_len=%d top_k=%d",
@@ -60,10 +122,26 @@ async def retrieve_memories(query: MemoryQuery) -> MemoryResult:
     return await provider.retrieve(query)
 
 
+@activity.defn(name="retrieve_memories_batch")
+async def retrieve_memories_batch(queries: List[MemoryQuery]) -> List[MemoryResult]:
+    """Retrieve memories for several agents at once.
+
+    Uses the provider's ``retrieve_batch`` when available, otherwise runs
+    the queries concurrently.  Results keep the order of ``queries``.
+    """
+    provider = _memory()
+
+    activity.logger.info("retrieve_memories_batch: queries=%d", len(queries))
+
+    if isinstance(provider, BatchMemoryProvider):
+        return await provider.retrieve_batch(queries)
+    return list(await asyncio.gather(*(provider.retrieve(q) for q in queries)))
+
+
 @activity.defn(name="update_world_state")
 async def update_world_state(action: AgentAction) -> AgentStateUpdate:
     """Apply an agent action via the registered state provider."""
-    provider = get_registry().require_state()
+    provider = _state()
 
     activity.logger.info(
         "update_world_state: agent=%s action=%s",
@@ -76,8 +154,19 @@ async def update_world_state(action: AgentAction) -> AgentStateUpdate:
 
 @activity.defn(name="generate_daily_plan")
 async def generate_daily_plan(request: DailyPlanRequest) -> DailyPlan:
-    """Generate a daily plan for an agent using the LLM provider."""
-    provider = get_registry().require_llm()
+    """Generate a daily plan for an agent using the LLM provider.
+
+    Plans are cached per agent for the current date and previous-day
+    summary; repeat requests return the cached plan without an LLM call.
+    """
+    today = date.today().isoformat()
+    key = (request.agent_id, today, request.previous_day_summary)
+    cached = _PLAN_CACHE.get(key)
+    if cached is not None:
+        activity.logger.info("generate_daily_plan: cached plan for %s", request.agent_id)
+        return cached
+
+    provider = _llm()
 
     activity.logger.info(
         "generate_daily_plan: agent=%s (%s)", request.agent_id, request.agent_name
@@ -99,11 +188,19 @@ async def generate_daily_plan(request: DailyPlanRequest) -> DailyPlan:
     text = llm_response.text or "[]"
 
     # Try to parse as JSON array; fall back to splitting by newline.
+    # (orjson.JSONDecodeError subclasses json.JSONDecodeError.)
+    loads = orjson.loads if orjson is not None else json.loads
     try:
-        steps = json.loads(text)
+        steps = loads(text)
         if not isinstance(steps, list):
             steps = [str(steps)]
     except json.JSONDecodeError:
         steps = [line.strip("- ") for line in text.strip().splitlines() if line.strip()]
 
-    return DailyPlan(agent_id=request.agent_id, plan_steps=steps)
+    plan = DailyPlan(agent_id=request.agent_id, plan_steps=steps)
+
+    # Entries from earlier dates can never be hit again
+    for stale in [k for k in _PLAN_CACHE if k[1] != today]:
+        del _PLAN_CACHE[stale]
+    _PLAN_CACHE[key] = plan
+    return plan
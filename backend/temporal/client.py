@@ -8,11 +8,16 @@ any app-specific config modules.
 
 from __future__ import annotations
 
+import asyncio
 from typing import Optional
 
 from temporalio.client import Client
 
+from temporal.converter import get_data_converter
+
 _client: Optional[Client] = None
+# Serialises the first connect so concurrent callers share one client
+_connect_lock = asyncio.Lock()
 _host: str = "localhost:7233"
 _namespace: str = "default"
 
@@ -31,8 +36,13 @@ def configure(*, host: str = "localhost:7233", namespace: str = "default") -> No
 async def get_client() -> Client:
     """Return a cached Temporal Client, connecting on first call."""
     global _client
-    if _client is None:
-        _client = await Client.connect(_host, namespace=_namespace)
+    if _client is not None:
+        return _client
+    async with _connect_lock:
+        if _client is None:
+            _client = await Client.connect(
+                _host, namespace=_namespace, data_converter=get_data_converter()
+            )
     return _client
 
 
@@ -0,0 +1,75 @@
+"""
+Payload converter for Temporal DTOs.
+
+Every activity and child-workflow hop encodes its arguments and result
+(prompts, LLM responses, memory lists) as ``json/plain`` payloads.  When
+``orjson`` is installed this module swaps the stdlib-JSON converter for one
+that encodes and parses in C; the wire format is unchanged, so workers and
+clients with and without it interoperate.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from typing import Any, Optional, Type
+
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    JSONPlainPayloadConverter,
+    value_to_type,
+)
+
+try:
+    import orjson
+except ImportError:  # optional: Temporal's stdlib JSON converter is used instead
+    orjson = None
+
+
+class OrjsonPlainPayloadConverter(JSONPlainPayloadConverter):
+    """``json/plain`` converter backed by orjson.
+
+    Dataclass DTOs are serialised directly, without ``asdict`` copies.
+    Values orjson can't encode fall back to the stdlib encoder.
+    """
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        try:
+            data = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return super().to_payload(value)
+        return Payload(metadata={"encoding": self.encoding.encode()}, data=data)
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        try:
+            obj = orjson.loads(payload.data)
+        except orjson.JSONDecodeError as err:
+            raise RuntimeError("Failed parsing") from err
+        if type_hint:
+            obj = value_to_type(type_hint, obj)
+        return obj
+
+
+class OrjsonPayloadConverter(CompositePayloadConverter):
+    """Temporal's default converter chain with the JSON step on orjson."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            *(
+                OrjsonPlainPayloadConverter()
+                if isinstance(c, JSONPlainPayloadConverter)
+                else c
+                for c in DefaultPayloadConverter.default_encoding_payload_converters
+            )
+        )
+
+
+def get_data_converter() -> DataConverter:
+    """Return the data converter clients and workers should connect with."""
+    if orjson is None:
+        return DataConverter.default
+    return dataclasses.replace(
+        DataConverter.default, payload_converter_class=OrjsonPayloadConverter
+    )
@@ -0,0 +1,184 @@
+"""
+Content-addressed cache for LLM responses.
+
+The ``call_llm`` activities route through :func:`get_or_call`, so a request
+identical to an earlier one (same model, prompt, temperature, token limit
+and extras) is answered from disk instead of the provider.  Entries are JSON
+files named by the request's SHA-256; the least recently used are evicted
+once more than ``max_entries`` are stored.
+
+Caching happens inside activities only — workflows stay deterministic and
+simply see the recorded activity result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from temporal._types import LLMRequest, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+_cache_dir: Path = Path(".cache/llm")
+_max_entries: int = 4096
+_enabled: bool = True
+
+# Request hash -> None, least recently used first; loaded from disk lazily
+_lru: Optional[OrderedDict[str, None]] = None
+
+
+def configure(
+    *,
+    directory: str | os.PathLike = ".cache/llm",
+    max_entries: int = 4096,
+    enabled: bool = True,
+) -> None:
+    """Set the cache location and size *before* the worker starts."""
+    global _cache_dir, _max_entries, _enabled, _lru
+    _cache_dir = Path(directory)
+    _max_entries = max_entries
+    _enabled = enabled
+    _lru = None
+
+
+def request_key(request: LLMRequest) -> str:
+    """SHA-256 of the fields that determine an LLM response."""
+    material = json.dumps(
+        [
+            request.model_name,
+            request.prompt.strip(),
+            request.temperature,
+            request.max_tokens,
+            request.extra,
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _path(key: str) -> Path:
+    return _cache_dir / f"{key}.json"
+
+
+def _index() -> OrderedDict[str, None]:
+    global _lru
+    if _lru is None:
+        # Hits touch the file's mtime, so it orders entries across restarts
+        entries = []
+        if _cache_dir.is_dir():
+            for path in _cache_dir.glob("*.json"):
+                try:
+                    entries.append((path.stat().st_mtime, path.stem))
+                except OSError:
+                    continue
+        entries.sort()
+        _lru = OrderedDict.fromkeys(key for _, key in entries)
+    return _lru
+
+
+def _read(key: str) -> Optional[LLMResponse]:
+    path = _path(key)
+    try:
+        data = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    # Reject entries written for another request or by an older schema
+    if not isinstance(data, dict) or data.pop("key", None) != key:
+        return None
+    try:
+        response = LLMResponse(**data)
+    except TypeError:
+        return None
+    if not isinstance(response.text, str) or not response.text:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return response
+
+
+def _write(key: str, response: LLMResponse, evicted: List[str]) -> None:
+    data = dataclasses.asdict(response)
+    data.pop("cache_hit", None)
+    data["key"] = key
+    _cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _path(key)
+    tmp = path.with_suffix(".tmp")
+    try:
+        tmp.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Could not write LLM cache entry %s: %s", key, e)
+    for old in evicted:
+        _path(old).unlink(missing_ok=True)
+
+
+async def _lookup(key: str) -> Optional[LLMResponse]:
+    lru = _index()
+    if key not in lru:
+        return None
+    cached = await asyncio.to_thread(_read, key)
+    if cached is None:
+        lru.pop(key, None)
+        return None
+    lru.move_to_end(key)
+    cached.cache_hit = True
+    return cached
+
+
+async def _store(key: str, response: LLMResponse) -> None:
+    # Empty completions are usually failures; don't pin them
+    if not response.text:
+        return
+    lru = _index()
+    lru[key] = None
+    lru.move_to_end(key)
+    evicted = []
+    while len(lru) > _max_entries:
+        evicted.append(lru.popitem(last=False)[0])
+    await asyncio.to_thread(_write, key, response, evicted)
+
+
+async def get_or_call(
+    request: LLMRequest,
+    call: Callable[[LLMRequest], Awaitable[LLMResponse]],
+) -> LLMResponse:
+    """Return the cached response for ``request``, or ``call`` it and store it."""
+    if not _enabled:
+        return await call(request)
+    key = request_key(request)
+    cached = await _lookup(key)
+    if cached is not None:
+        return cached
+    response = await call(request)
+    await _store(key, response)
+    return response
+
+
+async def get_or_call_batch(
+    requests: List[LLMRequest],
+    call_batch: Callable[[List[LLMRequest]], Awaitable[List[LLMResponse]]],
+) -> List[LLMResponse]:
+    """Batch form of :func:`get_or_call`: only the misses go to ``call_batch``."""
+    if not _enabled:
+        return await call_batch(requests)
+    keys = [request_key(r) for r in requests]
+    results: List[Optional[LLMResponse]] = [await _lookup(k) for k in keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        fresh = await call_batch([requests[i] for i in misses])
+        for i, response in zip(misses, fresh):
+            results[i] = response
+            await _store(keys[i], response)
+    return results  # type: ignore[return-value]
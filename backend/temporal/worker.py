@@ -18,10 +18,13 @@ from temporalio.worker import Worker
 
 from temporal.activities import (
     call_llm,
+    call_llm_batch,
     generate_daily_plan,
     retrieve_memories,
+    retrieve_memories_batch,
     update_world_state,
 )
+from temporal.converter import get_data_converter
 from temporal.workflows import (
     AgentLifecycleWorkflow,
     AgentTickWorkflow,
@@ -42,7 +45,9 @@ async def run_worker(
     """
     print(f"Connecting to Temporal at {host} (namespace={namespace})...")
 
-    client = await Client.connect(host, namespace=namespace)
+    client = await Client.connect(
+        host, namespace=namespace, data_converter=get_data_converter()
+    )
 
     worker = Worker(
         client,
@@ -54,8 +59,10 @@ async def run_worker(
         ],
         activities=[
             call_llm,
+            call_llm_batch,
             generate_daily_plan,
             retrieve_memories,
+            retrieve_memories_batch,
             update_world_state,
         ],
     )
@@ -83,6 +90,7 @@ def main() -> None:
     import json  # noqa: E402
 
     # Import the app-specific bootstrap that registers providers
+    from core.config import settings  # noqa: E402
     from providers import bootstrap_providers  # noqa: E402
     from services.memory_store import MemoryStore  # noqa: E402
     from models.state import WorldState  # noqa: E402
@@ -95,8 +103,29 @@ def main() -> None:
     memory_store = MemoryStore()
     bootstrap_providers(memory_store=memory_store, world_state=world_state)
 
+    # Anchor the LLM cache to the backend dir, not wherever we were launched
+    from temporal import llm_cache  # noqa: E402
+
+    cache_dir = Path(settings.temporal_llm_cache_dir)
+    if not cache_dir.is_absolute():
+        cache_dir = Path(backend_dir) / cache_dir
+    llm_cache.configure(
+        directory=cache_dir,
+        max_entries=settings.temporal_llm_cache_max_entries,
+        enabled=settings.temporal_llm_cache_enabled,
+    )
+
+    try:
+        # libuv-backed loop when available; stock asyncio otherwise
+        import uvloop
+    except ImportError:
+        uvloop = None
+
     try:
-        asyncio.run(run_worker())
+        if uvloop is not None:
+            uvloop.run(run_worker())
+        else:
+            asyncio.run(run_worker())
     except KeyboardInterrupt:
         print("\nWorker stopped.")
 
@@ -10,13 +10,16 @@ activity stubs defined within the ``temporal`` package itself.
 
 from __future__ import annotations
 
-import uuid
+import asyncio
+import json
+import re
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import List
+from typing import Awaitable, Dict, List, Optional, Set
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
 
 # Activities are imported inside a pass-through block so the workflow
 # sandbox doesn't try to import their transitive dependencies.
@@ -35,9 +38,35 @@ with workflow.unsafe.imports_passed_through():
         call_llm,
         generate_daily_plan,
         retrieve_memories,
+        retrieve_memories_batch,
         update_world_state,
     )
 
+    try:
+        import orjson
+    except ImportError:  # optional: stdlib json is used instead
+        orjson = None
+
+# ---------------------------------------------------------------------------
+# LLM output parsing
+# ---------------------------------------------------------------------------
+
+# Outermost {...} span, so prose the model puts around the JSON is ignored
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _parse_json_object(text: str) -> Optional[dict]:
+    """Extract and parse the JSON object in an LLM reply, or return None."""
+    m = _JSON_OBJECT_RE.search(text)
+    if m is None:
+        return None
+    try:
+        parsed = _json_loads(m.group(0))
+    except ValueError:  # JSONDecodeError, from either parser
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
 # ---------------------------------------------------------------------------
 # Shared retry policy
 # ---------------------------------------------------------------------------
@@ -49,12 +78,24 @@ DEFAULT_RETRY = RetryPolicy(
     maximum_attempts=5,
 )
 
+# Activity timeouts and sleeps, built once rather than per call
+RETRIEVE_TIMEOUT = timedelta(seconds=30)
+RETRIEVE_TIMEOUT_PER_QUERY = timedelta(seconds=2)
+LLM_TIMEOUT = timedelta(seconds=60)
+STATE_TIMEOUT = timedelta(seconds=15)
+PLAN_TIMEOUT = timedelta(seconds=60)
+INTER_STEP_SLEEP = timedelta(seconds=2)
+_NO_PAUSE = timedelta(0)
+
+# Longest raw LLM reply kept on an AgentTickResult
+LLM_REASONING_MAXLEN = 500
+
 # ---------------------------------------------------------------------------
 # Data-transfer objects for workflow I/O
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentTickInput:
     """Input for a single agent tick."""
     agent_id: str
@@ -62,9 +103,22 @@ class AgentTickInput:
     current_location_id: str
     current_action: str
     observations: str = ""
-
-
-@dataclass
+    # Current tile, when known
+    current_x: Optional[int] = None
+    current_y: Optional[int] = None
+    # True once a tick in the caller's current run has written the current_*
+    # values to the world state; only then may an unchanged decision skip the
+    # write.  Assumes the state provider keeps what it was given: a worker
+    # restart that reloads the seed world mid-run is only corrected by the
+    # agent's next change or the caller's next run.
+    state_written: bool = False
+    # Set by WorldSimulationWorkflow's batched retrieval; None = fetch per tick
+    preloaded_memories: Optional[List[str]] = None
+    # Whether the result carries the (truncated) raw LLM reply
+    store_llm_reasoning: bool = True
+
+
+@dataclass(slots=True)
 class AgentTickResult:
     """Output of a single agent tick."""
     agent_id: str
@@ -75,7 +129,7 @@ class AgentTickResult:
     llm_reasoning: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentLifecycleInput:
     """Input for the per-agent lifecycle workflow."""
     agent_id: str
@@ -84,21 +138,29 @@ class AgentLifecycleInput:
     current_location_id: str
     current_action: str
     day_number: int = 1
+    current_x: Optional[int] = None
+    current_y: Optional[int] = None
+    store_llm_reasoning: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class SimulationInput:
     """Input for the world simulation workflow."""
     tick_interval_seconds: int = 10
     max_ticks_before_continue_as_new: int = 100
     agents: List[AgentInfo] = None  # type: ignore[assignment]
+    store_llm_reasoning: bool = True
+    # Inner-voice commands not yet delivered, by agent id
+    pending_commands: Dict[str, List[str]] = None  # type: ignore[assignment]
 
     def __post_init__(self):
         if self.agents is None:
             self.agents = []
+        if self.pending_commands is None:
+            self.pending_commands = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentInfo:
     """Minimal agent info for the simulation workflow."""
     agent_id: str
@@ -106,6 +168,34 @@ class AgentInfo:
     persona: str
     current_location_id: str
     current_action: str
+    current_x: Optional[int] = None
+    current_y: Optional[int] = None
+
+
+# Tick decision prompt, filled with str.format_map (literal braces doubled)
+_DECISION_PROMPT = (
+    "You are {agent_name}.\n"
+    "You are currently at: {location}\n"
+    "You are doing: {action}\n"
+    "Your observations: {observations}\n\n"
+    "Your relevant memories:\n{memories}\n\n"
+    "Based on the above, decide your next action. "
+    "Respond in this exact JSON format:\n"
+    '{{"action": "<what you will do next>", '
+    '"location": "<where you will go (location_id)>", '
+    '"x": <grid_x>, "y": <grid_y>}}\n'
+    "Respond ONLY with the JSON."
+)
+
+
+def _memory_query(tick: AgentTickInput) -> MemoryQuery:
+    """The memory-retrieval query for one agent tick."""
+    context = (
+        f"Agent {tick.agent_name} is at {tick.current_location_id}, "
+        f"currently: {tick.current_action}. "
+        f"Observations: {tick.observations}"
+    )
+    return MemoryQuery(agent_id=tick.agent_id, context=context)
 
 
 # ---------------------------------------------------------------------------
@@ -129,64 +219,75 @@ class AgentTickWorkflow:
             "AgentTick started for %s (%s)", input.agent_id, input.agent_name
         )
 
-        # --- Step 1: Retrieve memories ---
-        context = (
-            f"Agent {input.agent_name} is at {input.current_location_id}, "
-            f"currently: {input.current_action}. "
-            f"Observations: {input.observations}"
-        )
-
-        memory_result: MemoryResult = await workflow.execute_activity(
-            retrieve_memories,
-            MemoryQuery(agent_id=input.agent_id, context=context),
-            start_to_close_timeout=timedelta(seconds=30),
-            retry_policy=DEFAULT_RETRY,
-        )
+        # --- Step 1: Retrieve memories (unless the parent already did) ---
+        memories = input.preloaded_memories
+        if memories is None:
+            memory_result: MemoryResult = await workflow.execute_activity(
+                retrieve_memories,
+                _memory_query(input),
+                start_to_close_timeout=RETRIEVE_TIMEOUT,
+                retry_policy=DEFAULT_RETRY,
+            )
+            memories = memory_result.memories
 
         # --- Step 2: Ask LLM to decide ---
-        memories_text = "\n".join(memory_result.memories)
-        decision_prompt = (
-            f"You are {input.agent_name}.\n"
-            f"You are currently at: {input.current_location_id}\n"
-            f"You are doing: {input.current_action}\n"
-            f"Your observations: {input.observations}\n\n"
-            f"Your relevant memories:\n{memories_text}\n\n"
-            "Based on the above, decide your next action. "
-            "Respond in this exact JSON format:\n"
-            '{"action": "<what you will do next>", '
-            '"location": "<where you will go (location_id)>", '
-            '"x": <grid_x>, "y": <grid_y>}\n'
-            "Respond ONLY with the JSON."
-        )
+        decision_prompt = _DECISION_PROMPT.format_map({
+            "agent_name": input.agent_name,
+            "location": input.current_location_id,
+            "action": input.current_action,
+            "observations": input.observations,
+            "memories": "\n".join(memories),
+        })
 
         llm_response: LLMResponse = await workflow.execute_activity(
             call_llm,
             LLMRequest(prompt=decision_prompt),
-            start_to_close_timeout=timedelta(seconds=60),
+            start_to_close_timeout=LLM_TIMEOUT,
             retry_policy=DEFAULT_RETRY,
         )
 
         # Parse the LLM response — best-effort JSON extraction
-        import json
-
         action_desc = input.current_action
         location_id = input.current_location_id
         new_x, new_y = 0, 0
 
-        try:
-            parsed = json.loads(llm_response.text)
-            action_desc = parsed.get("action", action_desc)
-            location_id = parsed.get("location", location_id)
-            new_x = int(parsed.get("x", 0))
-            new_y = int(parsed.get("y", 0))
-        except (json.JSONDecodeError, ValueError, TypeError):
+        parsed = _parse_json_object(llm_response.text)
+        if parsed is not None:
+            try:
+                action_desc = parsed.get("action", action_desc)
+                location_id = parsed.get("location", location_id)
+                new_x = int(parsed.get("x", 0))
+                new_y = int(parsed.get("y", 0))
+            except (ValueError, TypeError):
+                parsed = None
+        if parsed is None:
             workflow.logger.warning(
                 "Could not parse LLM response as JSON, using raw text: %s",
                 llm_response.text[:200],
             )
             action_desc = llm_response.text[:200]
 
-        # --- Step 3: Update world state ---
+        reasoning = (
+            llm_response.text[:LLM_REASONING_MAXLEN] if input.store_llm_reasoning else ""
+        )
+
+        # --- Step 3: Update world state (only if the decision changed it) ---
+        unchanged = input.state_written and input.current_x is not None and (
+            action_desc, location_id, new_x, new_y
+        ) == (
+            input.current_action, input.current_location_id,
+            input.current_x, input.current_y,
+        )
+        if unchanged and workflow.patched("tick-skip-unchanged-state-update"):
+            return AgentTickResult(
+                agent_id=input.agent_id,
+                new_action=input.current_action,
+                new_location_id=input.current_location_id,
+                new_x=new_x,
+                new_y=new_y,
+                llm_reasoning=reasoning,
+            )
+
         state_update: AgentStateUpdate = await workflow.execute_activity(
             update_world_state,
             AgentAction(
@@ -196,7 +297,7 @@ class AgentTickWorkflow:
                 target_x=new_x,
                 target_y=new_y,
             ),
-            start_to_close_timeout=timedelta(seconds=15),
+            start_to_close_timeout=STATE_TIMEOUT,
             retry_policy=DEFAULT_RETRY,
         )
 
@@ -206,7 +307,7 @@ class AgentTickWorkflow:
             new_location_id=state_update.new_location_id,
             new_x=state_update.new_x,
             new_y=state_update.new_y,
-            llm_reasoning=llm_response.text[:500],
+            llm_reasoning=reasoning,
         )
 
 
@@ -239,7 +340,7 @@ class AgentLifecycleWorkflow:
                 persona=input.persona,
                 previous_day_summary=input.current_action,
             ),
-            start_to_close_timeout=timedelta(seconds=60),
+            start_to_close_timeout=PLAN_TIMEOUT,
             retry_policy=DEFAULT_RETRY,
         )
 
@@ -250,24 +351,81 @@ class AgentLifecycleWorkflow:
         # --- Execute ticks for each plan step ---
         current_action = input.current_action
         current_location = input.current_location_id
+        current_x, current_y = input.current_x, input.current_y
+
+        steps = plan.plan_steps
+        prefetched: Optional[List[str]] = None
+        # The first tick of each run always writes the agent's state
+        state_written = False
+
+        def tick_input(step: str) -> AgentTickInput:
+            return AgentTickInput(
+                agent_id=input.agent_id,
+                agent_name=input.agent_name,
+                current_location_id=current_location,
+                current_action=current_action,
+                observations=f"Plan step: {step}",
+                current_x=current_x,
+                current_y=current_y,
+                preloaded_memories=prefetched,
+                store_llm_reasoning=input.store_llm_reasoning,
+                state_written=state_written,
+            )
 
-        for step in plan.plan_steps:
+        for step_idx, step in enumerate(steps):
+            started = workflow.now()
+            if workflow.patched("lifecycle-deterministic-tick-ids"):
+                # Unique per run (day numbers restart with a new lifecycle)
+                # and identical on replay
+                tick_id = (
+                    f"agent-tick-{input.agent_id}-{input.day_number}-{step_idx}"
+                    f"-{workflow.info().run_id}"
+                )
+            else:
+                tick_id = f"agent-tick-{input.agent_id}-{workflow.uuid4().hex[:8]}"
             tick_result: AgentTickResult = await workflow.execute_child_workflow(
                 AgentTickWorkflow.run,
-                AgentTickInput(
-                    agent_id=input.agent_id,
-                    agent_name=input.agent_name,
-                    current_location_id=current_location,
-                    current_action=current_action,
-                    observations=f"Plan step: {step}",
-                ),
-                id=f"agent-tick-{input.agent_id}-{uuid.uuid4().hex[:8]}",
+                tick_input(step),
+                id=tick_id,
             )
             current_action = tick_result.new_action
             current_location = tick_result.new_location_id
-
-            # Small delay between ticks
-            await workflow.sleep(timedelta(seconds=2))
+            current_x, current_y = tick_result.new_x, tick_result.new_y
+            prefetched = None
+            state_written = True
+
+            # Small delay between ticks, counted from when this tick started:
+            # a tick that already took longer than the delay isn't held back
+            if workflow.patched("lifecycle-pause-from-tick-start"):
+                pause = INTER_STEP_SLEEP - (workflow.now() - started)
+            else:
+                pause = INTER_STEP_SLEEP
+
+            last_step = step_idx + 1 == len(steps)
+            if last_step or not workflow.patched("lifecycle-prefetch-memories"):
+                if pause > _NO_PAUSE:
+                    await workflow.sleep(pause)
+                continue
+
+            # Retrieve the next step's memories during the delay between
+            # ticks, from the state this tick left the agent in
+            retrieval = workflow.start_activity(
+                retrieve_memories,
+                _memory_query(tick_input(steps[step_idx + 1])),
+                start_to_close_timeout=RETRIEVE_TIMEOUT,
+                retry_policy=DEFAULT_RETRY,
+            )
+            if pause > _NO_PAUSE:
+                await workflow.sleep(pause)
+            try:
+                memory_result: MemoryResult = await retrieval
+                prefetched = memory_result.memories
+            except ActivityError as e:
+                workflow.logger.warning(
+                    "Memory prefetch failed for %s, tick will retrieve: %s",
+                    input.agent_id,
+                    str(e),
+                )
 
         # --- Continue-As-New for next day ---
         workflow.continue_as_new(
@@ -278,6 +436,9 @@ class AgentLifecycleWorkflow:
                 current_location_id=current_location,
                 current_action=current_action,
                 day_number=input.day_number + 1,
+                current_x=current_x,
+                current_y=current_y,
+                store_llm_reasoning=input.store_llm_reasoning,
             )
         )
 
@@ -301,7 +462,16 @@ class WorldSimulationWorkflow:
 
     def __init__(self) -> None:
         self._running: bool = True
-        self._agents: List[AgentInfo] = []
+        # agent_id -> info, in registration order; one entry per agent so
+        # each gets exactly one (deterministically named) child per tick
+        self._agents: Dict[str, AgentInfo] = {}
+        # Agents signalled in since the last tick started; merged in one batch
+        self._pending_agents: List[AgentInfo] = []
+        # agent_id -> inner-voice commands, delivered with the agent's next tick
+        self._pending_commands: Dict[str, List[str]] = {}
+        # Agents whose state a tick in this run has written to the world
+        # state; starts empty after continue-as-new so each run writes once
+        self._state_written: Set[str] = set()
         self._tick_count: int = 0
 
     # -- Signals -------------------------------------------------------
@@ -316,7 +486,7 @@ class WorldSimulationWorkflow:
     async def add_agent(self, agent: AgentInfo) -> None:
         """Signal to register a new agent mid-simulation."""
         workflow.logger.info("Adding agent %s", agent.agent_id)
-        self._agents.append(agent)
+        self._pending_agents.append(agent)
 
     @workflow.signal
     async def agent_command(self, command: str) -> None:
@@ -325,28 +495,70 @@ class WorldSimulationWorkflow:
         Format: '<agent_id>:<command_text>'
         """
         workflow.logger.info("Agent command received: %s", command[:100])
-        # TODO: route command to the appropriate agent's tick input.
+        agent_id, sep, text = command.partition(":")
+        if not sep or not text.strip():
+            workflow.logger.warning("Ignoring malformed agent command: %s", command[:100])
+            return
+        self._pending_commands.setdefault(agent_id, []).append(text.strip())
 
     # -- Queries -------------------------------------------------------
 
     @workflow.query
     def get_status(self) -> dict:
+        agent_ids = list(self._agents)
+        agent_ids.extend(
+            a.agent_id for a in self._pending_agents if a.agent_id not in self._agents
+        )
         return {
             "running": self._running,
             "tick_count": self._tick_count,
-            "agent_count": len(self._agents),
-            "agents": [a.agent_id for a in self._agents],
+            "agent_count": len(agent_ids),
+            "agents": agent_ids,
         }
 
     # -- Main loop -----------------------------------------------------
 
+    def _drain_pending_agents(self) -> None:
+        """Merge agents added by signal since the last drain."""
+        for agent in self._pending_agents:
+            self._agents[agent.agent_id] = agent
+        self._pending_agents.clear()
+
+    async def _apply_tick(
+        self,
+        agent: AgentInfo,
+        handle: Awaitable[AgentTickResult],
+        commands: List[str],
+    ) -> None:
+        """Await one child tick and apply its result to the agent.
+
+        A failed tick is logged and its commands are queued again, ahead of
+        any that arrived meanwhile.
+        """
+        try:
+            result = await handle
+        except Exception as e:
+            workflow.logger.error("Tick failed for agent %s: %s", agent.agent_id, str(e))
+            if commands:
+                self._pending_commands[agent.agent_id] = (
+                    commands + self._pending_commands.get(agent.agent_id, [])
+                )
+            return
+        agent.current_action = result.new_action
+        agent.current_location_id = result.new_location_id
+        agent.current_x = result.new_x
+        agent.current_y = result.new_y
+        self._state_written.add(agent.agent_id)
+
     @workflow.run
     async def run(self, input: SimulationInput) -> str:
-        # Restore agents from continue-as-new (if any)
+        # Restore agents and undelivered commands from continue-as-new (if any)
         if input.agents:
             for agent in input.agents:
-                if agent.agent_id not in {a.agent_id for a in self._agents}:
-                    self._agents.append(agent)
+                self._agents.setdefault(agent.agent_id, agent)
+        for agent_id, commands in input.pending_commands.items():
+            # Carried-over commands predate any signalled into this run
+            self._pending_commands[agent_id] = commands + self._pending_commands.get(agent_id, [])
 
         workflow.logger.info(
             "WorldSimulation started: tick_interval=%ds, max_ticks=%d, restored_agents=%d",
@@ -355,13 +567,17 @@ class WorldSimulationWorkflow:
             len(self._agents),
         )
 
+        tick_interval = timedelta(seconds=input.tick_interval_seconds)
+
         while self._running and self._tick_count < input.max_ticks_before_continue_as_new:
+            self._drain_pending_agents()
             if not self._agents:
                 await workflow.wait_condition(
-                    lambda: len(self._agents) > 0 or not self._running
+                    lambda: len(self._pending_agents) > 0 or not self._running
                 )
                 if not self._running:
                     break
+                self._drain_pending_agents()
 
             self._tick_count += 1
             workflow.logger.info(
@@ -370,37 +586,88 @@ class WorldSimulationWorkflow:
                 len(self._agents),
             )
 
-            # Fan out agent ticks in parallel
-            tick_handles = []
-            for agent in self._agents:
-                handle = await workflow.start_child_workflow(
+            agents = list(self._agents.values())
+            # All commands received since each agent's last tick
+            delivered = [self._pending_commands.pop(a.agent_id, []) for a in agents]
+            tick_inputs = [
+                AgentTickInput(
+                    agent_id=agent.agent_id,
+                    agent_name=agent.agent_name,
+                    current_location_id=agent.current_location_id,
+                    current_action=agent.current_action,
+                    observations="; ".join(commands),
+                    current_x=agent.current_x,
+                    current_y=agent.current_y,
+                    store_llm_reasoning=input.store_llm_reasoning,
+                    state_written=agent.agent_id in self._state_written,
+                )
+                for agent, commands in zip(agents, delivered)
+            ]
+
+            # One batched memory retrieval for every agent this tick; if it
+            # fails the children fall back to retrieving their own
+            if workflow.patched("simulation-batched-memory-retrieval"):
+                try:
+                    memory_results: List[MemoryResult] = await workflow.execute_activity(
+                        retrieve_memories_batch,
+                        [_memory_query(t) for t in tick_inputs],
+                        start_to_close_timeout=(
+                            RETRIEVE_TIMEOUT + RETRIEVE_TIMEOUT_PER_QUERY * len(tick_inputs)
+                        ),
+                        retry_policy=DEFAULT_RETRY,
+                    )
+                    for tick_input, memory_result in zip(tick_inputs, memory_results):
+                        tick_input.preloaded_memories = memory_result.memories
+                except ActivityError as e:
+                    workflow.logger.warning(
+                        "Batched memory retrieval failed, agents will retrieve individually: %s",
+                        str(e),
+                    )
+
+            # Fan out agent ticks in parallel; all starts are submitted
+            # together rather than one round-trip per agent
+            deterministic_ids = workflow.patched("simulation-deterministic-tick-ids")
+            # _tick_count restarts with every run, so the run id keeps ids unique
+            run_id = workflow.info().run_id
+            child_starts = [
+                workflow.start_child_workflow(
                     AgentTickWorkflow.run,
-                    AgentTickInput(
-                        agent_id=agent.agent_id,
-                        agent_name=agent.agent_name,
-                        current_location_id=agent.current_location_id,
-                        current_action=agent.current_action,
+                    tick_input,
+                    id=(
+                        f"tick-{run_id}-{self._tick_count}-{tick_input.agent_id}"
+                        if deterministic_ids
+                        else f"tick-{self._tick_count}-{tick_input.agent_id}-"
+                        f"{workflow.uuid4().hex[:8]}"
                     ),
-                    id=f"tick-{self._tick_count}-{agent.agent_id}-{uuid.uuid4().hex[:8]}",
                 )
-                tick_handles.append((agent, handle))
+                for tick_input in tick_inputs
+            ]
+            if workflow.patched("simulation-concurrent-child-starts"):
+                handles = await asyncio.gather(*child_starts)
+            else:
+                handles = [await start for start in child_starts]
+
+            # Update each agent's local state as soon as its own tick
+            # finishes, so get_status never waits on the slowest agent
+            await asyncio.gather(*(
+                self._apply_tick(agent, handle, commands)
+                for agent, handle, commands in zip(agents, handles, delivered)
+            ))
 
-            # Collect results and update local agent state
-            for agent, handle in tick_handles:
+            # Wait for the next tick interval, waking early on stop_simulation
+            if workflow.patched("simulation-interruptible-tick-wait"):
                 try:
-                    result: AgentTickResult = await handle
-                    agent.current_action = result.new_action
-                    agent.current_location_id = result.new_location_id
-                except Exception as e:
-                    workflow.logger.error(
-                        "Tick failed for agent %s: %s", agent.agent_id, str(e)
+                    await workflow.wait_condition(
+                        lambda: not self._running, timeout=tick_interval
                     )
-
-            # Wait for the next tick interval
-            await workflow.sleep(timedelta(seconds=input.tick_interval_seconds))
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await workflow.sleep(tick_interval)
 
         # If we hit max ticks, continue-as-new to keep history bounded
         if self._running and self._tick_count >= input.max_ticks_before_continue_as_new:
+            self._drain_pending_agents()
             workflow.logger.info(
                 "Continuing-as-new after %d ticks with %d agents",
                 self._tick_count,
@@ -409,7 +676,9 @@ class WorldSimulationWorkflow:
             workflow.continue_as_new(SimulationInput(
                 tick_interval_seconds=input.tick_interval_seconds,
                 max_ticks_before_continue_as_new=input.max_ticks_before_continue_as_new,
-                agents=list(self._agents),
+                agents=list(self._agents.values()),
+                store_llm_reasoning=input.store_llm_reasoning,
+                pending_commands=self._pending_commands,
             ))
 
         return f"Simulation stopped after {self._tick_count} ticks"